@@ -4,10 +4,147 @@ This script helps visualize and analyze the results of pose detection operations
 that were previously saved using send_pose.py or send_pose_directory.py.
 """
 import json
+import mmap
 import os
-import argparse
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library parser
+    orjson = None
+
+
+# Files at least this large are parsed straight from a memory map
+MMAP_THRESHOLD = 8 * 1024 * 1024
+
+
+def _read_json(file_path: str, use_mmap: bool = False) -> Any:
+    """
+    Read and parse a JSON file, using orjson when it is available.
+    
+    Args:
+        file_path: Path to the JSON file
+        use_mmap: Parse large files from a memory map instead of reading them into memory
+        
+    Returns:
+        Parsed JSON data
+    """
+    with open(file_path, 'rb') as f:
+        if use_mmap and orjson is not None and os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    return orjson.loads(view)
+                finally:
+                    view.release()
+        raw = f.read()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+# Files larger than this are parsed on every load instead of being cached
+CACHE_MAX_BYTES = 4 * 1024 * 1024
+
+# Number of parsed files kept in each cache, the least recently used are dropped first
+CACHE_MAX_ENTRIES = 1024
+
+# Name of the on-disk cache file written with --cache
+CACHE_FILENAME = ".pose_results_cache.json"
+
+# Parsed files keyed by path, stored with the (mtime, size) they were read at.
+# Entries are shared with every caller and must be treated as read-only.
+_result_cache: "OrderedDict[str, Tuple[int, int, Any]]" = OrderedDict()
+_summary_cache: "OrderedDict[str, Tuple[int, int, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_put(cache: "OrderedDict[str, Tuple[int, int, Any]]", file_path: str, entry: Tuple[int, int, Any]) -> None:
+    """Store a parsed file, evicting the least recently used entries beyond CACHE_MAX_ENTRIES."""
+    with _cache_lock:
+        cache[file_path] = entry
+        cache.move_to_end(file_path)
+        while len(cache) > CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
+
+
+def _read_json_cached(
+    file_path: str,
+    cache: "OrderedDict[str, Tuple[int, int, Any]]",
+    use_mmap: bool = False
+) -> Any:
+    """
+    Parse a JSON file, reusing the cached result while the file is unchanged.
+    
+    Args:
+        file_path: Path to the JSON file
+        cache: Cache to look up and store the parsed data in
+        use_mmap: Parse large files from a memory map
+        
+    Returns:
+        Parsed JSON data, shared with the cache so it must not be modified
+    """
+    st = os.stat(file_path)
+    with _cache_lock:
+        entry = cache.get(file_path)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            cache.move_to_end(file_path)
+            return entry[2]
+    
+    data = _read_json(file_path, use_mmap)
+    if st.st_size <= CACHE_MAX_BYTES:
+        _cache_put(cache, file_path, (st.st_mtime_ns, st.st_size, data))
+    return data
+
+
+def load_result_cache(directory: str) -> None:
+    """
+    Load parsed results cached by a previous run from the given directory.
+    
+    Entries for files that no longer exist are dropped.
+    
+    Args:
+        directory: Directory containing the cache file
+    """
+    cache_path = Path(directory) / CACHE_FILENAME
+    if not cache_path.exists():
+        return
+    
+    try:
+        cached = _read_json(str(cache_path))
+        for key, cache in (("results", _result_cache), ("summaries", _summary_cache)):
+            for file_path, (mtime_ns, size, data) in cached.get(key, {}).items():
+                if os.path.exists(file_path):
+                    _cache_put(cache, file_path, (mtime_ns, size, data))
+    except Exception as e:
+        print(f"Ignoring unreadable cache file {cache_path}: {e}")
+
+
+def save_result_cache(directory: str) -> None:
+    """
+    Save the parsed results cache to the given directory for later runs.
+    
+    Args:
+        directory: Directory to write the cache file to
+    """
+    cache_path = Path(directory) / CACHE_FILENAME
+    with _cache_lock:
+        cached = {
+            "results": {file_path: list(entry) for file_path, entry in _result_cache.items()},
+            "summaries": {file_path: list(entry) for file_path, entry in _summary_cache.items()}
+        }
+    try:
+        with open(cache_path, 'wb') as f:
+            if orjson is not None:
+                f.write(orjson.dumps(cached))
+            else:
+                f.write(json.dumps(cached).encode())
+    except Exception as e:
+        print(f"Error saving cache file {cache_path}: {e}")
 
 
 def load_json_result(file_path: str) -> Dict[str, Any]:
@@ -18,12 +155,10 @@ def load_json_result(file_path: str) -> Dict[str, Any]:
         file_path: Path to the JSON result file
         
     Returns:
-        Dictionary containing the parsed JSON data
+        Dictionary containing the parsed JSON data, shared between calls so it must not be modified
     """
     try:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-        return data
+        return _read_json_cached(file_path, _result_cache)
     except Exception as e:
         print(f"Error loading file {file_path}: {e}")
         return {}
@@ -37,7 +172,7 @@ def load_summary_file(directory: str) -> Dict[str, Any]:
         directory: Directory path where the summary file is located
         
     Returns:
-        Dictionary containing the parsed summary data
+        Dictionary containing the parsed summary data, shared between calls so it must not be modified
     """
     summary_path = Path(directory) / "pose_detection_summary.json"
     if not summary_path.exists():
@@ -45,9 +180,7 @@ def load_summary_file(directory: str) -> Dict[str, Any]:
         return {}
     
     try:
-        with open(summary_path, 'r') as f:
-            data = json.load(f)
-        return data
+        return _read_json_cached(str(summary_path), _summary_cache, use_mmap=True)
     except Exception as e:
         print(f"Error loading summary file: {e}")
         return {}
@@ -74,15 +207,19 @@ def generate_action_report(summary_data: Dict[str, Any], output_file: str = None
         return "No actions detected in the processed files."
     
     # Format the report
-    report = "=== Pose Detection Action Report ===\n\n"
-    report += f"Total files processed: {stats.get('total_files', 0)}\n"
-    report += f"Total poses detected: {stats.get('total_poses_detected', 0)}\n"
-    report += f"Processing time: {stats.get('processing_time', 0):.2f} seconds\n\n"
-    
-    report += "Action Summary:\n"
-    report += "-" * 40 + "\n"
-    for action, count in sorted(actions.items(), key=lambda x: x[1], reverse=True):
-        report += f"{action}: {count}\n"
+    lines = [
+        "=== Pose Detection Action Report ===",
+        "",
+        f"Total files processed: {stats.get('total_files', 0)}",
+        f"Total poses detected: {stats.get('total_poses_detected', 0)}",
+        f"Processing time: {stats.get('processing_time', 0):.2f} seconds",
+        "",
+        "Action Summary:",
+        "-" * 40
+    ]
+    for action, count in Counter(actions).most_common():
+        lines.append(f"{action}: {count}")
+    report = "\n".join(lines) + "\n"
     
     # Save to file if requested
     if output_file:
@@ -106,62 +243,81 @@ def list_result_files(directory: str) -> List[Path]:
     Returns:
         List of paths to result files
     """
-    dir_path = Path(directory)
-    return list(dir_path.glob("*pose_result.json"))
+    # Hidden files are skipped, as the shell and glob.glob("*pose_result.json") do
+    with os.scandir(directory) as entries:
+        return [
+            Path(entry.path) for entry in entries
+            if entry.name.endswith("pose_result.json") and not entry.name.startswith(".")
+            and entry.is_file()
+        ]
 
 
-def summarize_file_results(result_files: List[Path]) -> Dict[str, Any]:
+def summarize_file_results(result_files: List[Path], max_workers: Optional[int] = None) -> Dict[str, Any]:
     """
     Generate a summary of results from multiple result files.
     
+    Files are loaded concurrently on a thread pool; the aggregation itself
+    runs on the calling thread.
+    
     Args:
         result_files: List of paths to result files
+        max_workers: Number of loader threads (defaults to 4 per CPU, max 32)
         
     Returns:
         Summary dictionary
     """
-    summary = {
-        "total_files": len(result_files),
-        "total_poses": 0,
-        "actions": {},
-        "files_with_poses": 0,
-        "files_with_errors": 0
-    }
+    if max_workers is None:
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
     
-    for file_path in result_files:
-        data = load_json_result(str(file_path))
-        
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        loaded = list(executor.map(load_json_result, (str(p) for p in result_files)))
+    
+    # Accumulate into locals and build the summary once at the end
+    actions = Counter()
+    total_poses = files_with_poses = files_with_errors = 0
+    
+    for data in loaded:
         if "detail" in data:
             # Error in this file
-            summary["files_with_errors"] += 1
+            files_with_errors += 1
             continue
         
         pose_count = data.get("count", 0)
-        summary["total_poses"] += pose_count
+        total_poses += pose_count
         
         if pose_count > 0:
-            summary["files_with_poses"] += 1
+            files_with_poses += 1
         
         # Collect action data
-        actions = data.get("detected_actions", {})
-        for action, count in actions.items():
-            if action not in summary["actions"]:
-                summary["actions"][action] = 0
-            summary["actions"][action] += count
+        actions.update(data.get("detected_actions", {}))
     
-    return summary
+    return {
+        "total_files": len(result_files),
+        "total_poses": total_poses,
+        "actions": dict(actions),
+        "files_with_poses": files_with_poses,
+        "files_with_errors": files_with_errors
+    }
 
 
 if __name__ == "__main__":
+    # Imported here so library users of this module do not pay for it
+    import argparse
+
     parser = argparse.ArgumentParser(description='Analyze pose detection results')
     
     parser.add_argument('directory', help='Directory containing pose detection results')
     parser.add_argument('--output', help='Output file for the report')
     parser.add_argument('--list', action='store_true', help='List all result files')
     parser.add_argument('--file', help='Analyze a specific result file')
+    parser.add_argument('--cache', action='store_true',
+                        help=f'Reuse parsed results between runs via {CACHE_FILENAME} in the directory')
     
     args = parser.parse_args()
     
+    if args.cache:
+        load_result_cache(args.directory)
+    
     if args.file:
         # Analyze a specific file
         data = load_json_result(args.file)
@@ -200,16 +356,20 @@ if __name__ == "__main__":
             files = list_result_files(args.directory)
             if files:
                 custom_summary = summarize_file_results(files)
-                report = f"=== Custom Pose Detection Summary ===\n\n"
-                report += f"Total files: {custom_summary['total_files']}\n"
-                report += f"Files with poses: {custom_summary['files_with_poses']}\n"
-                report += f"Files with errors: {custom_summary['files_with_errors']}\n"
-                report += f"Total poses detected: {custom_summary['total_poses']}\n\n"
-                
-                report += "Action Summary:\n"
-                report += "-" * 40 + "\n"
-                for action, count in sorted(custom_summary["actions"].items(), key=lambda x: x[1], reverse=True):
-                    report += f"{action}: {count}\n"
+                lines = [
+                    "=== Custom Pose Detection Summary ===",
+                    "",
+                    f"Total files: {custom_summary['total_files']}",
+                    f"Files with poses: {custom_summary['files_with_poses']}",
+                    f"Files with errors: {custom_summary['files_with_errors']}",
+                    f"Total poses detected: {custom_summary['total_poses']}",
+                    "",
+                    "Action Summary:",
+                    "-" * 40
+                ]
+                for action, count in Counter(custom_summary["actions"]).most_common():
+                    lines.append(f"{action}: {count}")
+                report = "\n".join(lines) + "\n"
                 
                 print(report)
                 
@@ -223,3 +383,6 @@ if __name__ == "__main__":
             # Use existing summary
             report = generate_action_report(summary, args.output)
             print(report)
+    
+    if args.cache:
+        save_result_cache(args.directory)
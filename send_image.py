@@ -1,76 +1,159 @@
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder
+from urllib3.util.retry import Retry
+import base64
 import json
-import os
-import argparse
 from pathlib import Path
-from typing import Dict, Tuple, Optional, Union, Any
+from typing import Dict, Mapping, Tuple, Optional, Union, Any
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+
+def create_session(pool_size: int = 32) -> requests.Session:
+    """
+    Create a requests session with HTTP keep-alive and connection pooling.
+
+    Args:
+        pool_size (int): Maximum number of pooled connections per host
+
+    Returns:
+        requests.Session: Session with retrying adapters mounted for http and https
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=3, backoff_factor=0.1)
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Shared session so consecutive requests reuse the same connection
+_SESSION = create_session()
+
+# Response header carrying the base64-encoded JSON result when return_image is set
+RESULT_HEADER = 'X-Detection-Result'
+
+
+def _post_image(
+    session: requests.Session,
+    api_url: str,
+    image: Union[str, bytes],
+    params: Optional[Dict[str, str]] = None
+) -> requests.Response:
+    """
+    Upload an image as a multipart body streamed from disk or memory.
+
+    Args:
+        session (requests.Session): Session to send the request with
+        api_url (str): URL of the gesture detection endpoint
+        image (Union[str, bytes]): Path to the image file, or the encoded image itself
+        params (dict): Optional query parameters
+
+    Returns:
+        requests.Response: The server response
+    """
+    if isinstance(image, (bytes, bytearray)):
+        encoder = MultipartEncoder(fields={'image': ('image.jpg', bytes(image), 'image/jpeg')})
+        return session.post(api_url, data=encoder, params=params,
+                            headers={'Content-Type': encoder.content_type})
+
+    with open(image, 'rb') as file_handle:
+        encoder = MultipartEncoder(fields={'image': (Path(image).name, file_handle, 'image/jpeg')})
+        return session.post(api_url, data=encoder, params=params,
+                            headers={'Content-Type': encoder.content_type})
+
+
+def _result_from_header(headers: Mapping[str, str]) -> Optional[Dict]:
+    """
+    Extract the detection result attached to a processed-image response.
+
+    The API can return the JSON result base64-encoded in the
+    X-Detection-Result header alongside the image, so a single request
+    yields both.
+
+    Args:
+        headers: Response headers
+
+    Returns:
+        Optional[Dict]: The decoded detection result, or None if not present
+    """
+    encoded = headers.get(RESULT_HEADER)
+    if not encoded:
+        return None
+    try:
+        return json.loads(base64.b64decode(encoded))
+    except ValueError:
+        return None
+
+
+def _write_json(path: Union[str, Path], data: Any) -> None:
+    """Write data to an indented JSON file, using orjson when it is available."""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
 
 
 def detect_gesture_in_image(
-    image_path: str, 
+    image_path: Union[str, bytes], 
     api_url: str = "http://localhost:8000/detect/gesture/image",
-    return_image: bool = False
+    return_image: bool = False,
+    session: Optional[requests.Session] = None
 ) -> Union[Dict, Tuple[Dict, bytes]]:
     """
     Send an image to the gesture detection endpoint and return the JSON response.
 
+    The image can be given as a path or, despite the parameter name, as the
+    encoded image itself, e.g. a frame already held in memory. The name is
+    kept so existing keyword callers keep working.
+
     Args:
-        image_path (str): Path to the image file
+        image_path (Union[str, bytes]): Path to the image file, or the encoded image itself
         api_url (str): URL of the gesture detection endpoint
         return_image (bool): If True, also return the processed image with marked gestures
+        session (requests.Session): Optional session to send requests with (defaults to a shared one)
 
     Returns:
         Union[Dict, Tuple[Dict, bytes]]: 
             - If return_image=False: JSON response with detection results
             - If return_image=True: Tuple of (JSON response, image bytes)
     """
-    # Check if the file exists
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image file not found: {image_path}")
-
-    # Prepare the files for upload
-    files = {
-        'image': (Path(image_path).name, open(image_path, 'rb'), 'image/jpeg')
-    }
-
-    params = {}
-    if return_image:
-        params['return_image'] = 'true'
+    if session is None:
+        session = _SESSION
 
     try:
-        # First make a call to get the JSON data
-        json_response = requests.post(api_url, files=files).json()
-        
-        # If return_image is True, make a second call to get the image
-        if return_image:
-            # Reopen the file for the second request
-            files = {
-                'image': (Path(image_path).name, open(image_path, 'rb'), 'image/jpeg')
-            }
-            try:
-                # Send request with return_image parameter
-                img_response = requests.post(api_url, files=files, params=params)
-                
-                # Check if we got an image or an error
-                if img_response.headers.get('content-type') == 'application/json':
-                    print(f"Warning: Received JSON instead of image: {img_response.text}")
-                    return json_response, None
-                
-                # Return both the JSON data and image bytes
-                return json_response, img_response.content
-            except requests.exceptions.RequestException as e:
-                print(f"Error getting processed image: {e}")
-                return json_response, None
-        else:
+        if not return_image:
             # Just return the JSON result
-            return json_response
+            return _post_image(session, api_url, image_path).json()
+
+        # Request the processed image; the JSON result is attached as a header
+        img_response = _post_image(session, api_url, image_path, {'return_image': 'true'})
 
+        # Check if we got an image or an error
+        if img_response.headers.get('content-type') == 'application/json':
+            print(f"Warning: Received JSON instead of image: {img_response.text}")
+            return img_response.json(), None
+
+        json_response = _result_from_header(img_response.headers)
     except requests.exceptions.RequestException as e:
         print(f"Error making request: {e}")
-        return None
-    finally:
-        # Make sure to close the file handle
-        files['image'][1].close()
+        return (None, None) if return_image else None
+
+    if json_response is None:
+        # Server did not attach the result, fall back to a separate JSON request
+        json_response = detect_gesture_in_image(image_path, api_url, False, session)
+
+    # Return both the JSON data and image bytes
+    return json_response, img_response.content
 
 
 def process_and_save_result(result: Dict, image_path: str, image_bytes: Optional[bytes] = None) -> str:
@@ -87,8 +170,7 @@ def process_and_save_result(result: Dict, image_path: str, image_bytes: Optional
     """
     # Save the JSON result to a file
     output_json = f"{Path(image_path).stem}_result.json"
-    with open(output_json, 'w') as f:
-        json.dump(result, f, indent=2)
+    _write_json(output_json, result)
     
     # Save the processed image if available
     if image_bytes:
@@ -131,33 +213,17 @@ def detect_gesture_as_function(
         If return_image_flag is False, returns just the detection result dictionary
         If return_image_flag is True, returns a tuple of (detection result, processed image bytes)
     """
-    # If input is a file path
-    if isinstance(image_path_or_bytes, str):
+    # File paths are streamed from disk, image bytes are sent directly
+    if isinstance(image_path_or_bytes, (str, bytes)):
         return detect_gesture_in_image(image_path_or_bytes, api_url, return_image_flag)
-    
-    # If input is image bytes
-    elif isinstance(image_path_or_bytes, bytes):
-        try:
-            # Create a temporary file
-            temp_file = Path("temp_image.jpg")
-            
-            # Write bytes to the file
-            with open(temp_file, 'wb') as f:
-                f.write(image_path_or_bytes)
-            
-            # Process the image
-            result = detect_gesture_in_image(str(temp_file), api_url, return_image_flag)
-            
-            return result
-        finally:
-            # Clean up the temporary file
-            if temp_file.exists():
-                temp_file.unlink()
     else:
         raise TypeError("Input must be either a file path (str) or image bytes (bytes)")
 
 
 if __name__ == "__main__":
+    # Imported here so library users of this module do not pay for it
+    import argparse
+
     # Set up argument parser
     parser = argparse.ArgumentParser(description='Detect gestures in an image')
     parser.add_argument('image_path', help='Path to the image file')
@@ -1,17 +1,107 @@
+import asyncio
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder
+from urllib3.util.retry import Retry
+import base64
 import json
 import os
-import argparse
 from pathlib import Path
-import time
 import shutil
-from typing import Dict, List, Tuple, Optional, Union, Any
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Dict, Mapping, List, Tuple, Optional, Union, Any
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+# Decoder used for API responses
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def create_session(pool_size: int = 32) -> requests.Session:
+    """
+    Create a requests session with HTTP keep-alive and connection pooling.
+
+    Args:
+        pool_size (int): Maximum number of pooled connections per host
+
+    Returns:
+        requests.Session: Session with retrying adapters mounted for http and https
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=3, backoff_factor=0.1)
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Shared session so consecutive requests reuse the same connection
+_SESSION = create_session()
+
+# Response header carrying the base64-encoded JSON result when return_image is set
+RESULT_HEADER = 'X-Detection-Result'
+
+
+def _post_image(
+    session: requests.Session,
+    api_url: str,
+    image_path: str,
+    params: Optional[Dict[str, str]] = None
+) -> requests.Response:
+    """
+    Upload an image as a multipart body streamed from disk.
+
+    Args:
+        session (requests.Session): Session to send the request with
+        api_url (str): URL of the gesture detection endpoint
+        image_path (str): Path to the image file
+        params (dict): Optional query parameters
+
+    Returns:
+        requests.Response: The server response
+    """
+    with open(image_path, 'rb') as file_handle:
+        encoder = MultipartEncoder(fields={'image': (Path(image_path).name, file_handle, 'image/jpeg')})
+        return session.post(api_url, data=encoder, params=params,
+                            headers={'Content-Type': encoder.content_type})
+
+
+def _result_from_header(headers: Mapping[str, str]) -> Optional[Dict]:
+    """
+    Extract the detection result attached to a processed-image response.
+
+    The API can return the JSON result base64-encoded in the
+    X-Detection-Result header alongside the image, so a single request
+    yields both.
+
+    Args:
+        headers: Response headers
+
+    Returns:
+        Optional[Dict]: The decoded detection result, or None if not present
+    """
+    encoded = headers.get(RESULT_HEADER)
+    if not encoded:
+        return None
+    try:
+        return _json_loads(base64.b64decode(encoded))
+    except ValueError:
+        return None
 
 
 def detect_gesture_in_image(
     image_path: str, 
     api_url: str = "http://localhost:8000/detect/gesture/image",
-    return_image: bool = False
+    return_image: bool = False,
+    session: Optional[requests.Session] = None
 ) -> Union[Dict, Tuple[Dict, bytes]]:
     """
     Send an image to the gesture detection endpoint and return the JSON response.
@@ -20,71 +110,282 @@ def detect_gesture_in_image(
         image_path (str): Path to the image file
         api_url (str): URL of the gesture detection endpoint
         return_image (bool): If True, also return the processed image with marked gestures
+        session (requests.Session): Optional session to send requests with (defaults to a shared one)
 
     Returns:
         Union[Dict, Tuple[Dict, bytes]]: 
             - If return_image=False: JSON response with detection results
             - If return_image=True: Tuple of (JSON response, image bytes)
     """
-    # Check if the file exists
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image file not found: {image_path}")
-
-    # Prepare the files for upload
-    files = {
-        'image': (Path(image_path).name, open(image_path, 'rb'), 'image/jpeg')
-    }
+    if session is None:
+        session = _SESSION
 
-    params = {}
-    if return_image:
-        params['return_image'] = 'true'
+    image_name = Path(image_path).name
 
     try:
-        # First make a call to get the JSON data
-        json_response = requests.post(api_url, files=files).json()
-        
-        # If return_image is True, make a second call to get the image
-        if return_image:
-            # Reopen the file for the second request
-            files = {
-                'image': (Path(image_path).name, open(image_path, 'rb'), 'image/jpeg')
-            }
-            try:
-                # Send request with return_image parameter
-                img_response = requests.post(api_url, files=files, params=params)
-                
-                # Check if we got an image or an error
-                if img_response.headers.get('content-type') == 'application/json':
-                    print(f"Warning: Received JSON instead of image for {Path(image_path).name}: {img_response.text}")
-                    return json_response, None
-                
-                # Return both the JSON data and image bytes
-                return json_response, img_response.content
-            except requests.exceptions.RequestException as e:
-                print(f"Error getting processed image for {Path(image_path).name}: {e}")
-                return json_response, None
-            finally:
-                files['image'][1].close()
-        else:
+        if not return_image:
             # Just return the JSON result
-            return json_response
+            return _post_image(session, api_url, image_path).json()
+
+        # Request the processed image; the JSON result is attached as a header
+        img_response = _post_image(session, api_url, image_path, {'return_image': 'true'})
+
+        # Check if we got an image or an error
+        if img_response.headers.get('content-type') == 'application/json':
+            print(f"Warning: Received JSON instead of image for {image_name}: {img_response.text}")
+            return img_response.json(), None
 
+        json_response = _result_from_header(img_response.headers)
     except requests.exceptions.RequestException as e:
-        print(f"Error making request for {Path(image_path).name}: {e}")
-        return None
+        print(f"Error making request for {image_name}: {e}")
+        return (None, None) if return_image else None
+
+    if json_response is None:
+        # Server did not attach the result, fall back to a separate JSON request
+        json_response = detect_gesture_in_image(image_path, api_url, False, session)
+
+    # Return both the JSON data and image bytes
+    return json_response, img_response.content
+
+
+async def detect_gesture_in_image_async(
+    session: aiohttp.ClientSession,
+    image_path: str,
+    api_url: str = "http://localhost:8000/detect/gesture/image",
+    return_image: bool = False
+) -> Union[Dict, Tuple[Dict, bytes]]:
+    """
+    Asynchronous counterpart of detect_gesture_in_image for use with aiohttp.
+
+    Args:
+        session (aiohttp.ClientSession): Session used to send the requests
+        image_path (str): Path to the image file
+        api_url (str): URL of the gesture detection endpoint
+        return_image (bool): If True, also return the processed image with marked gestures
+
+    Returns:
+        Union[Dict, Tuple[Dict, bytes]]: 
+            - If return_image=False: JSON response with detection results
+            - If return_image=True: Tuple of (JSON response, image bytes)
+    """
+    image_name = Path(image_path).name
+
+    params = {'return_image': 'true'} if return_image else None
+
+    try:
+        with open(image_path, 'rb') as file_handle:
+            form = aiohttp.FormData()
+            form.add_field('image', file_handle, filename=image_name, content_type='image/jpeg')
+            async with session.post(api_url, data=form, params=params) as response:
+                if not return_image:
+                    # Just return the JSON result
+                    return await response.json(content_type=None, loads=_json_loads)
+
+                # Check if we got an image or an error
+                if response.headers.get('content-type') == 'application/json':
+                    print(f"Warning: Received JSON instead of image for {image_name}: {await response.text()}")
+                    return await response.json(content_type=None, loads=_json_loads), None
+
+                json_response = _result_from_header(response.headers)
+                image_bytes = await response.read()
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        print(f"Error making request for {image_name}: {e}")
+        return (None, None) if return_image else None
+
+    if json_response is None:
+        # Server did not attach the result, fall back to a separate JSON request
+        json_response = await detect_gesture_in_image_async(session, image_path, api_url)
+
+    # Return both the JSON data and image bytes
+    return json_response, image_bytes
+
+
+async def detect_gestures_in_batch_async(
+    session: aiohttp.ClientSession,
+    image_paths: List[str],
+    api_url: str = "http://localhost:8000/detect/gesture/image_batch"
+) -> List[Optional[Dict]]:
+    """
+    Send several images in one request to the batch gesture detection endpoint.
+
+    The endpoint receives every image as an `images` multipart field and
+    returns a JSON array with one detection result per image, in order.
+
+    Args:
+        session (aiohttp.ClientSession): Session used to send the request
+        image_paths (list): Paths to the image files
+        api_url (str): URL of the batch gesture detection endpoint
+
+    Returns:
+        list: Detection results aligned with image_paths
+    """
+    try:
+        with ExitStack() as stack:
+            form = aiohttp.FormData()
+            for image_path in image_paths:
+                file_handle = stack.enter_context(open(image_path, 'rb'))
+                form.add_field('images', file_handle, filename=os.path.basename(image_path),
+                               content_type='image/jpeg')
+            async with session.post(api_url, data=form) as response:
+                json_response = await response.json(content_type=None, loads=_json_loads)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        print(f"Error making batch request for {len(image_paths)} images: {e}")
+        return [None] * len(image_paths)
+
+    if isinstance(json_response, list) and len(json_response) == len(image_paths):
+        return json_response
+
+    # An error response applies to every image in the batch
+    return [json_response] * len(image_paths)
+
+
+def _write_json(path: Union[str, Path], data: Any) -> None:
+    """Write data to an indented JSON file, using orjson when it is available."""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+
+def _write_bytes(path: Union[str, Path], data: bytes) -> None:
+    """Write raw bytes to a file."""
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+async def _process_images_async(
+    image_files: List[str],
+    api_url: str,
+    output_directory: str,
+    processed_dir: Optional[str],
+    concurrency: int,
+    batch_size: int = 1,
+    batch_url: Optional[str] = None,
+    delay: float = 0.0
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Send all images to the API with up to `concurrency` requests in flight.
+
+    Args:
+        image_files (list): Sorted list of image paths to process
+        api_url (str): URL of the gesture detection endpoint
+        output_directory (str): Directory to save the per-image JSON results to
+        processed_dir (str): Directory for processed images, or None to skip them
+        concurrency (int): Maximum number of concurrent requests
+        batch_size (int): Number of images per request to batch_url (1 disables batching)
+        batch_url (str): URL of the batch gesture detection endpoint
+        delay (float): Minimum time between the starts of two requests in seconds
+
+    Returns:
+        tuple: Detection results and summary entries, both keyed by image path
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    total = len(image_files)
+    loop = asyncio.get_running_loop()
+    next_start = loop.time()
+
+    async def pace() -> None:
+        # Space the requests out by the delay, each one takes the next free slot
+        nonlocal next_start
+        now = loop.time()
+        start = max(now, next_start)
+        next_start = start + delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    # Results are written on background threads so the next request can
+    # start while the previous one is still being saved
+    writer = ThreadPoolExecutor(max_workers=2)
+
+    async def save_one(
+        image_path: str,
+        stem: str,
+        result: Any,
+        image_bytes: Optional[bytes] = None,
+        output_image: Optional[str] = None
+    ) -> Tuple[str, Any, Dict[str, Any]]:
+        writes = [
+            # Save the individual result to a JSON file
+            loop.run_in_executor(writer, _write_json, os.path.join(output_directory, f"{stem}_result.json"), result)
+        ]
+        if image_bytes:
+            # Save processed image if available
+            writes.append(loop.run_in_executor(writer, _write_bytes, output_image, image_bytes))
+        await asyncio.gather(*writes)
+        if image_bytes:
+            print(f"  - Saved processed image to {output_image}")
+
+        # Keep a simplified summary entry with just the essentials
+        summary_entry = {
+            "gestures": result.get("gestures", []) if result else None,
+            "count": result.get("count", 0) if result else 0,
+            "processed_image": output_image
+        }
+        return image_path, result, summary_entry
+
+    async def process_one(index: int, image_path: str) -> List[Tuple[str, Any, Dict[str, Any]]]:
+        name = os.path.basename(image_path)
+        stem, suffix = os.path.splitext(name)
+        output_image = None
+        image_bytes = None
+
+        async with semaphore:
+            await pace()
+            print(f"Processing image {index}/{total}: {name}")
+
+            if processed_dir is not None:
+                # Get both JSON and image
+                result, image_bytes = await detect_gesture_in_image_async(session, image_path, api_url, True)
+                output_image = os.path.join(processed_dir, f"{stem}_processed{suffix}")
+            else:
+                # Get only JSON result
+                result = await detect_gesture_in_image_async(session, image_path, api_url)
+
+        return [await save_one(image_path, stem, result, image_bytes, output_image)]
+
+    async def process_batch(index: int, batch: List[str]) -> List[Tuple[str, Any, Dict[str, Any]]]:
+        async with semaphore:
+            await pace()
+            print(f"Processing images {index}-{index + len(batch) - 1}/{total}")
+            batch_results = await detect_gestures_in_batch_async(session, batch, batch_url)
+
+        return await asyncio.gather(*(
+            save_one(image_path, os.path.splitext(os.path.basename(image_path))[0], result)
+            for image_path, result in zip(batch, batch_results)
+        ))
+
+    if batch_size > 1 and processed_dir is None:
+        tasks = [
+            process_batch(start + 1, image_files[start:start + batch_size])
+            for start in range(0, total, batch_size)
+        ]
+    else:
+        tasks = [process_one(i, image_path) for i, image_path in enumerate(image_files, 1)]
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    try:
+        async with aiohttp.ClientSession(connector=connector) as session:
+            processed = [entry for group in await asyncio.gather(*tasks) for entry in group]
     finally:
-        # Make sure to close the file handle
-        if not return_image:  # Only close if we didn't already close it above
-            files['image'][1].close()
+        writer.shutdown(wait=True)
+
+    results = {path: result for path, result, _ in processed}
+    summary = {path: entry for path, _, entry in processed}
+    return results, summary
 
 
 def process_image_directory(
     directory_path: str, 
     api_url: str = "http://localhost:8000/detect/gesture/image",
     image_extensions: Tuple[str, ...] = ('.jpg', '.jpeg', '.png'), 
-    delay: float = 0.5,
+    delay: float = 0.0,
     output_dir: str = None,
-    return_images: bool = False
+    return_images: bool = False,
+    concurrency: int = 8,
+    batch_size: int = 1,
+    batch_url: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Process all images in a directory.
@@ -93,9 +394,12 @@ def process_image_directory(
         directory_path (str): Path to the directory containing images
         api_url (str): URL of the gesture detection endpoint
         image_extensions (tuple): File extensions to process
-        delay (float): Delay between requests in seconds
+        delay (float): Minimum time between the starts of two requests in seconds
         output_dir (str): Optional directory to save results to (defaults to same as input)
         return_images (bool): If True, request and save processed images with detections
+        concurrency (int): Maximum number of requests in flight at once
+        batch_size (int): Number of images sent per request to the batch endpoint (1 disables batching)
+        batch_url (str): URL of the batch endpoint (defaults to api_url with a "_batch" suffix)
 
     Returns:
         dict: Dictionary with image paths as keys and detection results as values
@@ -113,15 +417,20 @@ def process_image_directory(
         output_directory = directory
 
     # Create a processed_images directory if returning images
+    processed_dir = None
     if return_images:
         processed_dir = output_directory / "processed_images"
         processed_dir.mkdir(exist_ok=True)
     
-    # Find all image files in the directory
-    image_files = []
-    for ext in image_extensions:
-        image_files.extend(directory.glob(f"*{ext}"))
-        image_files.extend(directory.glob(f"*{ext.upper()}"))
+    # Find all image files in the directory with a single scan, keeping
+    # plain string paths since they are cheaper to sort and split than Path
+    extensions = {ext.lower() for ext in image_extensions}
+    with os.scandir(directory) as entries:
+        image_files = sorted(
+            entry.path for entry in entries
+            if os.path.splitext(entry.name)[1].lower() in extensions
+            and entry.is_file()
+        )
 
     if not image_files:
         print(f"No images with extensions {image_extensions} found in {directory_path}")
@@ -129,48 +438,24 @@ def process_image_directory(
 
     print(f"Found {len(image_files)} images to process in {directory_path}")
 
-    # Process each image
-    results = {}
-    for i, image_path in enumerate(sorted(image_files), 1):
-        print(f"Processing image {i}/{len(image_files)}: {image_path.name}")
-        
-        if return_images:
-            # Get both JSON and image
-            result, image_bytes = detect_gesture_in_image(str(image_path), api_url, True)
-            
-            # Save processed image if available
-            if image_bytes:
-                output_image = processed_dir / f"{image_path.stem}_processed{image_path.suffix}"
-                with open(output_image, 'wb') as f:
-                    f.write(image_bytes)
-                print(f"  - Saved processed image to {output_image}")
-        else:
-            # Get only JSON result
-            result = detect_gesture_in_image(str(image_path), api_url)
-        
-        # Save the individual result to a JSON file
-        output_json = output_directory / f"{image_path.stem}_result.json"
-        with open(output_json, 'w') as f:
-            json.dump(result, f, indent=2)
-        
-        results[str(image_path)] = result
-
-        # Add delay between requests to avoid overwhelming the server
-        if i < len(image_files) and delay > 0:
-            time.sleep(delay)
+    if batch_size > 1 and return_images:
+        print("Batching is not supported with --return-images, sending images one at a time")
+
+    # Process the images concurrently
+    results, summary = asyncio.run(_process_images_async(
+        image_files,
+        api_url,
+        str(output_directory),
+        str(processed_dir) if processed_dir is not None else None,
+        concurrency,
+        batch_size,
+        batch_url or f"{api_url}_batch",
+        delay
+    ))
 
     # Create a summary file
     summary_path = output_directory / "detection_summary.json"
-    with open(summary_path, 'w') as f:
-        # Create a simplified summary with just the essentials
-        summary = {
-            str(path): {
-                "gestures": result.get("gestures", []) if result else None,
-                "count": result.get("count", 0) if result else 0,
-                "processed_image": str(processed_dir / f"{Path(path).stem}_processed{Path(path).suffix}") if return_images else None
-            } for path, result in results.items()
-        }
-        json.dump(summary, f, indent=2)
+    _write_json(summary_path, summary)
 
     print(f"\nProcessing complete. Processed {len(image_files)} images.")
     print(f"Summary saved to {summary_path}")
@@ -179,19 +464,28 @@ def process_image_directory(
 
 
 if __name__ == "__main__":
+    # Imported here so library users of this module do not pay for it
+    import argparse
+
     # Set up argument parser
     parser = argparse.ArgumentParser(description='Process multiple images in a directory for gesture detection')
     
     parser.add_argument('directory_path', help='Path to the directory containing images')
     parser.add_argument('--url', default="http://localhost:8000/detect/gesture/image",
                         help='URL of the gesture detection API endpoint')
-    parser.add_argument('--delay', type=float, default=0.5,
-                        help='Delay between processing images (seconds)')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Maximum number of images sent to the API at once')
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help='Minimum time between the starts of two requests in seconds (default: 0)')
     parser.add_argument('--formats', default='jpg,jpeg,png',
                         help='Comma-separated list of image formats to process')
     parser.add_argument('--output', help='Directory to save results (default: same as input)')
     parser.add_argument('--return-images', action='store_true',
                         help='Request and save processed images with gesture markers')
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='Number of images sent per request to the batch endpoint (default: 1, no batching)')
+    parser.add_argument('--batch-url',
+                        help='URL of the batch gesture detection endpoint (default: --url with a "_batch" suffix)')
     
     # Parse arguments
     args = parser.parse_args()
@@ -206,7 +500,10 @@ if __name__ == "__main__":
         formats,
         args.delay,
         args.output,
-        args.return_images
+        args.return_images,
+        args.concurrency,
+        args.batch_size,
+        args.batch_url
     )
     
     # Print a simple summary of results
@@ -3,12 +3,443 @@ Script for sending images to the pose detection API.
 This utility allows users to send an image file to the pose detection API 
 and retrieve the detection results.
 """
+import asyncio
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder
+from urllib3.util.retry import Retry
+import io
 import json
+import logging
 import os
-import argparse
+import sys
+import uuid
+from heapq import nlargest
+from operator import itemgetter
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Tuple, Optional, Union, Any
+from urllib.parse import urljoin
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Tuple, Optional, Union, Any
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library parser/encoder
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Decoder used for API responses
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def create_session(pool_size: int = 8) -> requests.Session:
+    """
+    Create a requests session with HTTP keep-alive and connection pooling.
+
+    Args:
+        pool_size (int): Maximum number of pooled connections per host
+
+    Returns:
+        requests.Session: Session with retrying adapters mounted for http and https
+    """
+    # Retry uploads answered by a busy or restarting server with exponential backoff.
+    # The last response is returned rather than raised so its error details are kept.
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=["GET", "POST"],
+        raise_on_status=False
+    )
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Shared session so the JSON and media requests reuse the same connection
+_SESSION = create_session()
+
+# Files larger than this (in MB) are uploaded with chunked transfer encoding
+CHUNKED_UPLOAD_THRESHOLD_MB = 32
+
+# Size of each chunk read from disk for chunked uploads
+UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Size of each chunk written to disk when streaming processed media
+MEDIA_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Maximum number of detected actions listed in a video summary
+SUMMARY_MAX_ACTIONS = 20
+
+class PathInfo(NamedTuple):
+    """Parts of a file path used to name uploads and output files."""
+    path: Path
+    parent: Path
+    stem: str
+    name: str
+    suffix: str
+
+
+@lru_cache(maxsize=128)
+def _pinfo(file_path: str) -> PathInfo:
+    """Split a file path into its parts once, reusing the result for later calls with the same path."""
+    path = Path(file_path)
+    return PathInfo(path, path.parent, path.stem, path.name, path.suffix.lower())
+
+
+# Response header naming the stored result, whose media can then be fetched with a GET
+RESULT_ID_HEADER = 'X-Pose-Result-Id'
+
+# Endpoints seen answering without RESULT_ID_HEADER. Their media always needs a second
+# upload, so it is started alongside the JSON request. Any other endpoint gets the JSON
+# request first so a result id can be used on the very first file.
+_NO_RESULT_ID_URLS = set()
+
+# Runs media uploads and writes alongside the JSON request and result write
+_MEDIA_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+# File extensions handled in image and video mode
+_IMAGE_EXTS = frozenset({'.jpg', '.jpeg', '.png', '.webp', '.bmp'})
+_VIDEO_EXTS = frozenset({'.mp4', '.avi', '.mov', '.wmv', '.mkv'})
+
+# Multipart field name and content type sent for each processing mode
+_MEDIA_FIELDS = {
+    'image': ('image', 'image/jpeg'),
+    'video': ('video', 'video/mp4'),
+}
+
+
+def _response_json(response: requests.Response) -> Any:
+    """
+    Decode a JSON response body, using orjson when it is available.
+
+    Decoding errors are raised as requests exceptions, like response.json() does,
+    so callers handle them together with the other request failures.
+    """
+    if orjson is None:
+        return response.json()
+    try:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError as e:
+        raise requests.exceptions.RequestException(str(e), response=response)
+
+
+def _write_json(path: Union[str, Path], data: Any) -> None:
+    """Write data to an indented JSON file, using orjson when it is available."""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+
+def _write_bytes(path: Union[str, Path], data: bytes) -> None:
+    """Write raw bytes to a file."""
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _save_streamed(response: requests.Response, path: Union[str, Path]) -> int:
+    """Write a streamed response body to a file chunk by chunk and return its size."""
+    size = 0
+    with open(path, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=MEDIA_DOWNLOAD_CHUNK_SIZE):
+            f.write(chunk)
+            size += len(chunk)
+    return size
+
+
+class _Reiterable:
+    """Iterable that starts a fresh iterator from a generator function on every pass."""
+
+    def __init__(self, factory: Callable[[], Iterator[bytes]]):
+        self._factory = factory
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self._factory()
+
+
+class _RewindableMultipart:
+    """
+    Multipart/form-data body streamed by MultipartEncoder that can be rewound.
+
+    MultipartEncoder reads the file a block at a time and knows the total
+    Content-Length up front, but it can only be read once. Seeking back to
+    the start builds a fresh encoder with the same boundary, so urllib3 can
+    resend the whole body when it retries a request.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        field_name: str,
+        filename: str,
+        content_type: str,
+        file_data: Optional[bytes] = None
+    ):
+        self._file_path = file_path
+        self._field_name = field_name
+        self._filename = filename
+        self._file_content_type = content_type
+        self._file_data = file_data
+        self._boundary = uuid.uuid4().hex
+        self._file_handle = None
+        self._start()
+
+    def _start(self) -> None:
+        if self._file_data is not None:
+            body = self._file_data
+        else:
+            body = self._file_handle = open(self._file_path, 'rb')
+        self._encoder = MultipartEncoder(
+            fields={self._field_name: (self._filename, body, self._file_content_type)},
+            boundary=self._boundary
+        )
+        self._position = 0
+
+    @property
+    def content_type(self) -> str:
+        return self._encoder.content_type
+
+    @property
+    def len(self) -> int:
+        return self._encoder.len
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._encoder.read(size)
+        self._position += len(chunk)
+        return chunk
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> None:
+        if offset != 0 or whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("multipart body can only be rewound to the start")
+        self.close()
+        self._start()
+
+    def close(self) -> None:
+        if self._file_handle is not None:
+            self._file_handle.close()
+            self._file_handle = None
+
+
+def _chunked_multipart_body(
+    file_path: str,
+    field_name: str,
+    filename: str,
+    content_type: str,
+    chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> Tuple[Iterable[bytes], str]:
+    """
+    Build a multipart/form-data body that is read from disk one chunk at a time.
+
+    Passing the returned iterable as the request body makes requests use
+    chunked transfer encoding, so the file never has to be held in memory.
+    Each iteration reads the file again from the start, so a retried
+    request sends the whole body once more.
+
+    Args:
+        file_path (str): Path to the file to upload
+        field_name (str): Name of the form field
+        filename (str): File name reported to the server
+        content_type (str): Content type of the file part
+        chunk_size (int): Number of bytes read per chunk
+
+    Returns:
+        Tuple[Iterable[bytes], str]: The body and its Content-Type header value
+    """
+    boundary = uuid.uuid4().hex
+    quoted_name = filename.replace('"', '%22')
+
+    def body() -> Iterator[bytes]:
+        yield (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{field_name}"; filename="{quoted_name}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        ).encode()
+        with open(file_path, 'rb') as file_handle:
+            while True:
+                chunk = file_handle.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        yield f'\r\n--{boundary}--\r\n'.encode()
+
+    return _Reiterable(body), f'multipart/form-data; boundary={boundary}'
+
+
+def _post_media(
+    session: requests.Session,
+    api_url: str,
+    file_path: str,
+    field_name: str,
+    content_type: str,
+    params: Dict[str, str],
+    file_size: float,
+    file_data: Optional[bytes] = None,
+    stream: bool = False
+) -> requests.Response:
+    """
+    Upload a media file to the API as multipart form data.
+
+    Args:
+        session (requests.Session): Session to send the request with
+        api_url (str): URL of the pose detection endpoint
+        file_path (str): Path to the file to upload
+        field_name (str): Name of the form field ('image' or 'video')
+        content_type (str): Content type of the file
+        params (dict): Query parameters
+        file_size (float): Size of the file in MB
+        file_data (bytes): Contents of the file if already read, sent instead of reading it again
+        stream (bool): If True, leave the response body unread so it can be streamed
+
+    Returns:
+        requests.Response: The server response
+    """
+    filename = _pinfo(file_path).name
+
+    # Large files are streamed with chunked transfer encoding
+    if file_data is None and file_size > CHUNKED_UPLOAD_THRESHOLD_MB:
+        body, multipart_type = _chunked_multipart_body(file_path, field_name, filename, content_type)
+        return session.post(api_url, data=body, params=params, stream=stream,
+                            headers={'Content-Type': multipart_type})
+
+    # Stream the multipart body instead of building it in memory with files=
+    encoder = _RewindableMultipart(file_path, field_name, filename, content_type, file_data)
+    try:
+        return session.post(api_url, data=encoder, params=params, stream=stream,
+                            headers={'Content-Type': encoder.content_type})
+    finally:
+        encoder.close()
+
+
+def _fetch_processed_media(
+    session: requests.Session,
+    api_url: str,
+    file_path: str,
+    field_name: str,
+    content_type: str,
+    params: Dict[str, str],
+    file_size: float,
+    json_response: Dict,
+    return_flag: str,
+    pending: Optional[Future] = None,
+    result_id: Optional[str] = None
+) -> requests.Response:
+    """
+    Fetch the processed media for a file whose JSON result is already known.
+
+    When the server stored the processed media (save_image / save_video) the
+    JSON result carries a download_url, so the media is downloaded from there
+    instead of uploading the file a second time. Servers that name the result
+    in the X-Pose-Result-Id header serve its media from api_url/<result_id>.
+    Otherwise the file is sent again with the return flag set, unless that
+    upload was already started alongside the JSON request and is passed in as
+    pending. The body of the returned response is left unread so it can be
+    streamed.
+
+    Args:
+        session (requests.Session): Session to send the request with
+        api_url (str): URL of the pose detection endpoint
+        file_path (str): Path to the file that was processed
+        field_name (str): Multipart field name used for the upload
+        content_type (str): MIME type of the uploaded file
+        params (Dict[str, str]): Query parameters of the JSON request
+        file_size (float): File size in MB
+        json_response (Dict): JSON result of the first request
+        return_flag (str): Query parameter asking the server for the media
+        pending (Future): Media upload already in flight, see _start_media_upload
+        result_id (str): Value of the X-Pose-Result-Id header of the JSON response
+
+    Returns:
+        requests.Response: Response carrying the processed media
+    """
+    if pending is not None:
+        return pending.result()
+
+    download_url = json_response.get('download_url')
+    if download_url:
+        return session.get(urljoin(api_url, download_url), stream=True)
+
+    if result_id:
+        return session.get(f"{api_url}/{result_id}", params={'format': field_name}, stream=True)
+
+    media_params = params.copy()
+    media_params[return_flag] = 'true'
+    return _post_media(session, api_url, file_path, field_name, content_type, media_params, file_size,
+                       stream=True)
+
+
+def _start_media_upload(
+    session: requests.Session,
+    api_url: str,
+    file_path: str,
+    field_name: str,
+    content_type: str,
+    params: Dict[str, str],
+    file_size: float,
+    return_flag: str,
+    file_data: Optional[bytes] = None
+) -> Future:
+    """
+    Start uploading a file for its processed media in the background.
+
+    Used when the server will not store the media and has been seen
+    answering without a result id, so the second upload is needed anyway. Running it alongside
+    the JSON request overlaps both uploads and both inference runs.
+
+    Args:
+        session (requests.Session): Session to send the request with
+        api_url (str): URL of the pose detection endpoint
+        file_path (str): Path to the file to process
+        field_name (str): Multipart field name used for the upload
+        content_type (str): MIME type of the uploaded file
+        params (Dict[str, str]): Query parameters of the JSON request
+        file_size (float): File size in MB
+        return_flag (str): Query parameter asking the server for the media
+        file_data (bytes): Contents of the file if already read
+
+    Returns:
+        Future: Future resolving to the response carrying the processed media
+    """
+    media_params = params.copy()
+    media_params[return_flag] = 'true'
+    return _MEDIA_EXECUTOR.submit(
+        _post_media, session, api_url, file_path, field_name, content_type, media_params, file_size, file_data,
+        stream=True
+    )
+
+
+def _discard_media_upload(pending: Optional[Future]) -> None:
+    """
+    Drop a media upload started by _start_media_upload whose result is not needed.
+
+    An upload still waiting in the executor is cancelled. One already sent has
+    its response closed once it arrives, so the pooled connection is released.
+
+    Args:
+        pending (Future): Media upload in flight, or None
+    """
+    if pending is None or pending.cancel():
+        return
+
+    def close(future: Future) -> None:
+        if future.exception() is None:
+            future.result().close()
+
+    pending.add_done_callback(close)
 
 
 def detect_pose_in_image(
@@ -16,8 +447,10 @@ def detect_pose_in_image(
     api_url: str = "http://localhost:8001/detect/pose/image",
     return_image: bool = False,
     save_image: bool = False,
-    save_results: bool = False
-) -> Union[Dict, Tuple[Dict, bytes]]:
+    save_results: bool = False,
+    session: Optional[requests.Session] = None,
+    media_path: Optional[str] = None
+) -> Union[Dict, Tuple[Dict, Optional[bytes]]]:
     """
     Send an image to the pose detection endpoint and return the JSON response.
 
@@ -27,82 +460,108 @@ def detect_pose_in_image(
         return_image (bool): If True, also return the processed image with marked poses
         save_image (bool): If True, save processed image on the server
         save_results (bool): If True, request to save detailed results in JSON file
+        session (requests.Session): Optional session to send requests with (defaults to a shared one)
+        media_path (str): If given with return_image=True, stream the processed image into this file
+            instead of holding it in memory
 
     Returns:
-        Union[Dict, Tuple[Dict, bytes]]: 
+        Union[Dict, Tuple[Dict, Optional[bytes]]]: 
             - If return_image=False: JSON response with detection results
-            - If return_image=True: Tuple of (JSON response, image bytes)
+            - If return_image=True: Tuple of (JSON response, image bytes), the bytes being None
+              when the image was written to media_path or could not be retrieved
     """
-    # Check if the file exists
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image file not found: {image_path}")
-
-    # Get file info for logging
-    file_size = os.path.getsize(image_path) / (1024 * 1024)  # MB
-    filename = Path(image_path).name
-    print(f"Processing image: {filename} ({file_size:.2f} MB)")
-
-    # Prepare the files for upload
-    with open(image_path, 'rb') as file_handle:
-        files = {
-            'image': (filename, file_handle, 'image/jpeg')
-        }
-
-        # Set up parameters
-        params = {}
-        if save_image:
-            params['save_image'] = 'true'
-        if save_results:
-            params['save_results'] = 'true'
+    # Check that the file exists and get its size for logging with a single stat call
+    try:
+        file_stat = os.stat(image_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Image file not found: {image_path}") from None
 
-        try:
-            # Make JSON request
-            print(f"Sending request to {api_url}...")
-            response = requests.post(api_url, files=files, params=params)
-            
-            # Check for errors
-            response.raise_for_status()
+    file_size = file_stat.st_size / (1024 * 1024)  # MB
+    filename = _pinfo(image_path).name
+    logger.info("Processing image: %s (%.2f MB)", filename, file_size)
+
+    if session is None:
+        session = _SESSION
+
+    # Set up parameters
+    params = {}
+    if save_image:
+        params['save_image'] = 'true'
+    if save_results:
+        params['save_results'] = 'true'
+
+    try:
+        # Without a stored copy or a result id the media needs its own upload,
+        # so send it right away instead of after the JSON request
+        pending = None
+        file_data = None
+        if return_image and not save_image and api_url in _NO_RESULT_ID_URLS:
+            # Both uploads send the same file, so read it from disk only once.
+            # Large files keep streaming from disk rather than sitting in memory.
+            if file_size <= CHUNKED_UPLOAD_THRESHOLD_MB:
+                file_data = _pinfo(image_path).path.read_bytes()
+            pending = _start_media_upload(
+                session, api_url, image_path, 'image', 'image/jpeg', params, file_size, 'return_image', file_data
+            )
+
+        # Make JSON request
+        logger.info("Sending request to %s...", api_url)
+        response = _post_media(session, api_url, image_path, 'image', 'image/jpeg', params, file_size, file_data)
+        
+        # Check for errors
+        response.raise_for_status()
+        
+        # Parse JSON response
+        json_response = _response_json(response)
+        logger.info("Received response with status code: %s", response.status_code)
+
+        # Remember servers that do not name their results so later media uploads start early
+        result_id = response.headers.get(RESULT_ID_HEADER)
+        if result_id:
+            _NO_RESULT_ID_URLS.discard(api_url)
+        else:
+            _NO_RESULT_ID_URLS.add(api_url)
+        
+        # If we need to get the processed image
+        if return_image:
+            logger.info("Requesting processed image...")
+            try:
+                img_response = _fetch_processed_media(
+                    session, api_url, image_path, 'image', 'image/jpeg', params, file_size,
+                    json_response, 'return_image', pending, result_id
+                )
+                img_response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                logger.error("Error requesting processed image: %s", e)
+                return json_response, None
             
-            # Parse JSON response
-            json_response = response.json()
-            print(f"Received response with status code: {response.status_code}")
+            # Check if we got an image back
+            if img_response.headers.get('content-type') == 'application/json':
+                logger.warning("Warning: Received JSON instead of image: %s", img_response.text)
+                return json_response, None
             
-            # If we need to get the processed image
-            if return_image:
-                # Re-open the file for a second request
-                with open(image_path, 'rb') as file_handle:
-                    files = {
-                        'image': (filename, file_handle, 'image/jpeg')
-                    }
-                    # Add return_image parameter
-                    img_params = params.copy()
-                    img_params['return_image'] = 'true'
-                    
-                    # Send request for image
-                    print("Requesting processed image...")
-                    img_response = requests.post(api_url, files=files, params=img_params)
-                    img_response.raise_for_status()
-                    
-                    # Check if we got an image back
-                    if img_response.headers.get('content-type') == 'application/json':
-                        print(f"Warning: Received JSON instead of image: {img_response.text}")
-                        return json_response, None
-                    
-                    print(f"Received image data: {len(img_response.content)} bytes")
-                    return json_response, img_response.content
+            if media_path is not None:
+                size = _save_streamed(img_response, media_path)
+                logger.info("Received image data: %s bytes", size)
+                logger.info("Processed image saved to %s", media_path)
+                return json_response, None
             
-            return json_response
-
-        except requests.exceptions.RequestException as e:
-            print(f"Error making request: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    error_json = e.response.json()
-                    print(f"Server error: {error_json.get('detail', str(e))}")
-                    return error_json
-                except:
-                    pass
-            return {"detail": str(e)}
+            logger.info("Received image data: %s bytes", len(img_response.content))
+            return json_response, img_response.content
+        
+        return json_response
+
+    except requests.exceptions.RequestException as e:
+        logger.error("Error making request: %s", e)
+        _discard_media_upload(pending)
+        if hasattr(e, 'response') and e.response is not None:
+            try:
+                error_json = e.response.json()
+                logger.error("Server error: %s", error_json.get('detail', str(e)))
+                return error_json
+            except:
+                pass
+        return {"detail": str(e)}
 
 
 def process_pose_result(result: Dict, image_path: str, image_bytes: Optional[bytes] = None) -> str:
@@ -117,59 +576,76 @@ def process_pose_result(result: Dict, image_path: str, image_bytes: Optional[byt
     Returns:
         str: Summary of the detection results
     """
-    # Save the JSON result to a file
-    output_path = Path(image_path).parent
-    output_json = output_path / f"{Path(image_path).stem}_pose_result.json"
-    with open(output_json, 'w') as f:
-        json.dump(result, f, indent=2)
-    
-    # Save the processed image if available
+    source = _pinfo(image_path)
+    output_path, stem = source.parent, source.stem
+    output_json = output_path / f"{stem}_pose_result.json"
+
+    # Save the processed image if available, in the background while the JSON is written
+    media_write = None
     if image_bytes:
-        output_image = output_path / f"{Path(image_path).stem}_pose_processed.jpg"
-        with open(output_image, 'wb') as f:
-            f.write(image_bytes)
-        print(f"Processed image saved to {output_image}")
+        output_image = output_path / f"{stem}_pose_processed.jpg"
+        media_write = _MEDIA_EXECUTOR.submit(_write_bytes, output_image, image_bytes)
+
+    # Save the JSON result to a file
+    _write_json(output_json, result)
+
+    if media_write is not None:
+        media_write.result()
+        logger.info("Processed image saved to %s", output_image)
     
     # Generate summary text
-    summary = f"Pose detection completed for {Path(image_path).name}\n"
-    summary += f"Results saved to {output_json}\n\n"
+    lines = [
+        f"Pose detection completed for {source.name}",
+        f"Results saved to {output_json}",
+        "",
+    ]
     
     if result and "detail" in result:
         # Error response
-        summary += f"Error: {result['detail']}\n"
+        lines.append(f"Error: {result['detail']}")
     elif result:
-        # Normal response with poses
-        summary += f"Total poses detected: {result.get('count', 0)}\n"
+        # Normal response with poses, look each field up once
+        results_file = result.get("results_file")
+        server_image_path = result.get("image_path")
+        detected_actions = result.get("detected_actions")
+        poses = result.get("poses")
+        download_url = result.get("download_url")
+
+        lines.append(f"Total poses detected: {result.get('count', 0)}")
         
         # Add paths to results files if available
-        if "results_file" in result and result["results_file"]:
-            summary += f"Detailed results saved on server at: {result['results_file']}\n"
+        if results_file:
+            lines.append(f"Detailed results saved on server at: {results_file}")
         
-        if "image_path" in result and result["image_path"]:
-            summary += f"Processed image saved on server at: {result['image_path']}\n"
+        if server_image_path:
+            lines.append(f"Processed image saved on server at: {server_image_path}")
         
         # Add action statistics if available
-        if "detected_actions" in result and result["detected_actions"]:
-            summary += "\nDetected actions:\n"
-            for action, count in result["detected_actions"].items():
-                summary += f"- {action}: {count} instances\n"
+        if detected_actions:
+            lines.append("")
+            lines.append("Detected actions:")
+            for action, count in detected_actions.items():
+                lines.append(f"- {action}: {count} instances")
         
         # Show pose information
-        if "poses" in result and result["poses"]:
-            summary += "\nDetected poses:\n"
-            for i, pose in enumerate(result["poses"]):
+        if poses:
+            lines.append("")
+            lines.append("Detected poses:")
+            for i, pose in enumerate(poses):
                 confidence = pose.get("confidence", 0.0)
                 action = pose.get("action", "Not classified")
                 landmark_count = len(pose.get("landmarks", []))
-                summary += f"- Pose {i+1}: Action={action}, Confidence={confidence:.2f}, Landmarks={landmark_count}\n"
+                lines.append(f"- Pose {i+1}: Action={action}, Confidence={confidence:.2f}, Landmarks={landmark_count}")
         
         # Add download info if available
-        if "download_url" in result and result["download_url"]:
-            summary += f"\nDownload URL: {result['download_url']}\n"
+        if download_url:
+            lines.append("")
+            lines.append(f"Download URL: {download_url}")
     else:
-        summary += "No poses detected or empty response received."
+        lines.append("No poses detected or empty response received.")
+        return "\n".join(lines)
     
-    return summary
+    return "\n".join(lines) + "\n"
 
 
 def detect_pose_in_video(
@@ -177,8 +653,10 @@ def detect_pose_in_video(
     api_url: str = "http://localhost:8001/detect/pose/video",
     return_video: bool = False,
     save_video: bool = False,
-    save_results: bool = False
-) -> Union[Dict, Tuple[Dict, bytes]]:
+    save_results: bool = False,
+    session: Optional[requests.Session] = None,
+    media_path: Optional[str] = None
+) -> Union[Dict, Tuple[Dict, Optional[bytes]]]:
     """
     Send a video to the pose detection endpoint and return the JSON response.
 
@@ -188,82 +666,109 @@ def detect_pose_in_video(
         return_video (bool): If True, also return the processed video with marked poses
         save_video (bool): If True, save processed video on the server
         save_results (bool): If True, request to save detailed results in JSON file
+        session (requests.Session): Optional session to send requests with (defaults to a shared one)
+        media_path (str): If given with return_video=True, stream the processed video into this file
+            instead of holding it in memory
 
     Returns:
-        Union[Dict, Tuple[Dict, bytes]]: 
+        Union[Dict, Tuple[Dict, Optional[bytes]]]: 
             - If return_video=False: JSON response with detection results
-            - If return_video=True: Tuple of (JSON response, video bytes)
+            - If return_video=True: Tuple of (JSON response, video bytes), the bytes being None
+              when the video was written to media_path or could not be retrieved
     """
-    # Check if the file exists
-    if not os.path.exists(video_path):
-        raise FileNotFoundError(f"Video file not found: {video_path}")
-
-    # Get file info for logging
-    file_size = os.path.getsize(video_path) / (1024 * 1024)  # MB
-    filename = Path(video_path).name
-    print(f"Processing video: {filename} ({file_size:.2f} MB)")
-
-    # Prepare the files for upload
-    with open(video_path, 'rb') as file_handle:
-        files = {
-            'video': (filename, file_handle, 'video/mp4')
-        }
-
-        # Set up parameters
-        params = {}
-        if save_video:
-            params['save_video'] = 'true'
-        if save_results:
-            params['save_results'] = 'true'
-        if return_video:
-            params['return_video'] = 'true'
+    # Check that the file exists and get its size for logging with a single stat call
+    try:
+        file_stat = os.stat(video_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Video file not found: {video_path}") from None
 
-        try:
-            # Make request
-            print(f"Sending request to {api_url}...")
-            print(f"This may take some time for larger videos...")
-            response = requests.post(api_url, files=files, params=params)
+    file_size = file_stat.st_size / (1024 * 1024)  # MB
+    filename = _pinfo(video_path).name
+    logger.info("Processing video: %s (%.2f MB)", filename, file_size)
+
+    if session is None:
+        session = _SESSION
+
+    # Set up parameters
+    params = {}
+    if save_video:
+        params['save_video'] = 'true'
+    if save_results:
+        params['save_results'] = 'true'
+
+    try:
+        # Without a stored copy or a result id the media needs its own upload,
+        # so send it right away instead of after the JSON request
+        pending = None
+        file_data = None
+        if return_video and not save_video and api_url in _NO_RESULT_ID_URLS:
+            # Both uploads send the same file, so read it from disk only once.
+            # Large files keep streaming from disk rather than sitting in memory.
+            if file_size <= CHUNKED_UPLOAD_THRESHOLD_MB:
+                file_data = _pinfo(video_path).path.read_bytes()
+            pending = _start_media_upload(
+                session, api_url, video_path, 'video', 'video/mp4', params, file_size, 'return_video', file_data
+            )
+
+        # Make request
+        logger.info("Sending request to %s...", api_url)
+        logger.info("This may take some time for larger videos...")
+        response = _post_media(session, api_url, video_path, 'video', 'video/mp4', params, file_size, file_data)
+        
+        # Check for errors
+        response.raise_for_status()
+        
+        # Parse JSON response
+        json_response = _response_json(response)
+        logger.info("Received response with status code: %s", response.status_code)
+
+        # Remember servers that do not name their results so later media uploads start early
+        result_id = response.headers.get(RESULT_ID_HEADER)
+        if result_id:
+            _NO_RESULT_ID_URLS.discard(api_url)
+        else:
+            _NO_RESULT_ID_URLS.add(api_url)
+        
+        # If we need to get the processed video
+        if return_video:
+            logger.info("Requesting processed video...")
+            try:
+                video_response = _fetch_processed_media(
+                    session, api_url, video_path, 'video', 'video/mp4', params, file_size,
+                    json_response, 'return_video', pending, result_id
+                )
+                video_response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                logger.error("Error requesting processed video: %s", e)
+                return json_response, None
             
-            # Check for errors
-            response.raise_for_status()
+            # Check if we got a video back
+            if video_response.headers.get('content-type') != 'video/mp4':
+                logger.warning("Warning: Received %s instead of video", video_response.headers.get('content-type'))
+                return json_response, None
             
-            # Check if we got a video or JSON
-            if response.headers.get('content-type') == 'video/mp4':
-                # For return_video=true, we've received the video directly
-                print(f"Received video response: {len(response.content)} bytes")
-                
-                # Make a second request to get the JSON data
-                with open(video_path, 'rb') as file_handle:
-                    files = {
-                        'video': (filename, file_handle, 'video/mp4')
-                    }
-                    # Remove return_video flag to get JSON
-                    json_params = params.copy()
-                    json_params.pop('return_video', None)
-                    
-                    print("Requesting JSON data...")
-                    json_response = requests.post(api_url, files=files, params=json_params)
-                    json_response.raise_for_status()
-                    json_data = json_response.json()
-                
-                return json_data, response.content
-            else:
-                # Parse JSON response
-                json_response = response.json()
-                print(f"Received response with status code: {response.status_code}")
-                
-                return json_response
-
-        except requests.exceptions.RequestException as e:
-            print(f"Error making request: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    error_json = e.response.json()
-                    print(f"Server error: {error_json.get('detail', str(e))}")
-                    return error_json
-                except:
-                    pass
-            return {"detail": str(e)}
+            if media_path is not None:
+                size = _save_streamed(video_response, media_path)
+                logger.info("Received video response: %s bytes", size)
+                logger.info("Processed video saved to %s", media_path)
+                return json_response, None
+            
+            logger.info("Received video response: %s bytes", len(video_response.content))
+            return json_response, video_response.content
+        
+        return json_response
+
+    except requests.exceptions.RequestException as e:
+        logger.error("Error making request: %s", e)
+        _discard_media_upload(pending)
+        if hasattr(e, 'response') and e.response is not None:
+            try:
+                error_json = e.response.json()
+                logger.error("Server error: %s", error_json.get('detail', str(e)))
+                return error_json
+            except:
+                pass
+        return {"detail": str(e)}
 
 
 def process_pose_video_result(result: Dict, video_path: str, video_bytes: Optional[bytes] = None) -> str:
@@ -278,56 +783,297 @@ def process_pose_video_result(result: Dict, video_path: str, video_bytes: Option
     Returns:
         str: Summary of the detection results
     """
-    # Save the JSON result to a file
-    output_path = Path(video_path).parent
-    output_json = output_path / f"{Path(video_path).stem}_pose_result.json"
-    with open(output_json, 'w') as f:
-        json.dump(result, f, indent=2)
-    
-    # Save the processed video if available
+    source = _pinfo(video_path)
+    output_path, stem = source.parent, source.stem
+    output_json = output_path / f"{stem}_pose_result.json"
+
+    # Save the processed video if available, in the background while the JSON is written
+    media_write = None
     if video_bytes:
-        output_video = output_path / f"{Path(video_path).stem}_pose_processed.mp4"
-        with open(output_video, 'wb') as f:
-            f.write(video_bytes)
-        print(f"Processed video saved to {output_video}")
+        output_video = output_path / f"{stem}_pose_processed.mp4"
+        media_write = _MEDIA_EXECUTOR.submit(_write_bytes, output_video, video_bytes)
+
+    # Save the JSON result to a file
+    _write_json(output_json, result)
+
+    if media_write is not None:
+        media_write.result()
+        logger.info("Processed video saved to %s", output_video)
     
     # Generate summary text
-    summary = f"Pose detection completed for {Path(video_path).name}\n"
-    summary += f"Results saved to {output_json}\n\n"
+    lines = [
+        f"Pose detection completed for {source.name}",
+        f"Results saved to {output_json}",
+        "",
+    ]
     
     if result and "detail" in result:
         # Error response
-        summary += f"Error: {result['detail']}\n"
+        lines.append(f"Error: {result['detail']}")
     elif result:
-        # Normal response with poses
-        summary += f"Total poses detected: {result.get('count', 0)}\n"
+        # Normal response with poses, look each field up once
+        results_file = result.get("results_file")
+        server_video_path = result.get("video_path")
+        detected_actions = result.get("detected_actions")
+        download_url = result.get("download_url")
+
+        lines.append(f"Total poses detected: {result.get('count', 0)}")
         
         # Add paths to results files if available
-        if "results_file" in result and result["results_file"]:
-            summary += f"Detailed results saved on server at: {result['results_file']}\n"
+        if results_file:
+            lines.append(f"Detailed results saved on server at: {results_file}")
         
-        if "video_path" in result and result["video_path"]:
-            summary += f"Processed video saved on server at: {result['video_path']}\n"
+        if server_video_path:
+            lines.append(f"Processed video saved on server at: {server_video_path}")
         
         # Add action statistics if available
-        if "detected_actions" in result and result["detected_actions"]:
-            summary += "\nDetected actions:\n"
-            for action, count in sorted(result["detected_actions"].items(), key=lambda x: x[1], reverse=True):
-                summary += f"- {action}: {count} instances\n"
+        if detected_actions:
+            lines.append("")
+            lines.append("Detected actions:")
+            for action, count in nlargest(SUMMARY_MAX_ACTIONS, detected_actions.items(), key=itemgetter(1)):
+                lines.append(f"- {action}: {count} instances")
+            if len(detected_actions) > SUMMARY_MAX_ACTIONS:
+                lines.append(f"- ... and {len(detected_actions) - SUMMARY_MAX_ACTIONS} more actions")
         
         # Add download info if available
-        if "download_url" in result and result["download_url"]:
-            summary += f"\nDownload URL: {result['download_url']}\n"
+        if download_url:
+            lines.append("")
+            lines.append(f"Download URL: {download_url}")
     else:
-        summary += "No poses detected or empty response received."
+        lines.append("No poses detected or empty response received.")
+        return "\n".join(lines)
     
-    return summary
+    return "\n".join(lines) + "\n"
+
+
+# Detection function, result writer and processed media extension for each processing mode
+_DISPATCH = {
+    'image': (detect_pose_in_image, process_pose_result, '.jpg'),
+    'video': (detect_pose_in_video, process_pose_video_result, '.mp4'),
+}
+
+
+async def detect_pose_async(
+    session: aiohttp.ClientSession,
+    file_path: str,
+    api_url: str,
+    mode: str = 'image',
+    return_media: bool = False,
+    params: Optional[Dict[str, str]] = None
+) -> Union[Dict, Tuple[Dict, Optional[bytes]]]:
+    """
+    Asynchronous counterpart of detect_pose_in_image / detect_pose_in_video for use with aiohttp.
+
+    Args:
+        session (aiohttp.ClientSession): Session used to send the requests
+        file_path (str): Path to the image or video file
+        api_url (str): URL of the pose detection endpoint
+        mode (str): Processing mode, 'image' or 'video'
+        return_media (bool): If True, also return the processed image/video with marked poses
+        params (Dict[str, str]): Optional query parameters (save_image, save_results, ...)
+
+    Returns:
+        Union[Dict, Tuple[Dict, Optional[bytes]]]:
+            - If return_media=False: JSON response with detection results
+            - If return_media=True: Tuple of (JSON response, media bytes)
+    """
+    field_name, content_type = _MEDIA_FIELDS[mode]
+    filename = _pinfo(file_path).name
+    params = dict(params or {})
+
+    loop = asyncio.get_running_loop()
+    file_data = None
+
+    async def post(post_params: Dict[str, str]) -> aiohttp.ClientResponse:
+        # Open the file off the event loop, aiohttp then streams it from the handle
+        if file_data is None:
+            payload = await loop.run_in_executor(None, open, file_path, 'rb')
+        else:
+            payload = nullcontext(file_data)
+        with payload as body:
+            form = aiohttp.FormData()
+            form.add_field(field_name, body, filename=filename, content_type=content_type)
+            response = await session.post(api_url, data=form, params=post_params)
+            await response.read()
+            return response
+
+    # Without a stored copy or a result id the media needs its own upload,
+    # so send it alongside the JSON request
+    media_task = None
+    if return_media and f'save_{mode}' not in params and api_url in _NO_RESULT_ID_URLS:
+        # Both uploads send the same file, so read it from disk only once
+        if os.path.getsize(file_path) <= CHUNKED_UPLOAD_THRESHOLD_MB * 1024 * 1024:
+            file_data = await loop.run_in_executor(None, _pinfo(file_path).path.read_bytes)
+        media_task = asyncio.ensure_future(post({**params, f'return_{mode}': 'true'}))
+
+    try:
+        response = await post(params)
+        json_response = await response.json(content_type=None, loads=_json_loads)
+        result_id = response.headers.get(RESULT_ID_HEADER)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        logger.error("Error making request for %s: %s", filename, e)
+        if media_task is not None:
+            # Wait for the cancelled upload to finish so its connection is released
+            media_task.cancel()
+            await asyncio.gather(media_task, return_exceptions=True)
+        json_response = {"detail": str(e)}
+        return (json_response, None) if return_media else json_response
+
+    if result_id:
+        _NO_RESULT_ID_URLS.discard(api_url)
+    else:
+        _NO_RESULT_ID_URLS.add(api_url)
+
+    if not return_media:
+        return json_response
+
+    try:
+        # Download the stored media when the server kept it, otherwise upload again
+        download_url = json_response.get('download_url')
+        if media_task is not None:
+            response = await media_task
+            media = await response.read()
+        elif download_url:
+            # The body can only be read before the response is released
+            async with session.get(urljoin(api_url, download_url)) as response:
+                media = await response.read()
+        elif result_id:
+            async with session.get(f"{api_url}/{result_id}", params={'format': mode}) as response:
+                media = await response.read()
+        else:
+            response = await post({**params, f'return_{mode}': 'true'})
+            media = await response.read()
+        response.raise_for_status()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error("Error requesting processed %s for %s: %s", mode, filename, e)
+        return json_response, None
+
+    if response.content_type == 'application/json':
+        logger.warning("Warning: Received JSON instead of %s for %s", mode, filename)
+        return json_response, None
+
+    return json_response, media
+
+
+async def _process_files_async(
+    files: List[Tuple[str, str]],
+    api_urls: Dict[str, str],
+    return_media: bool,
+    params: Dict[str, Dict[str, str]],
+    concurrency: int
+) -> Dict[str, Any]:
+    """
+    Send files to the pose detection API concurrently and save their results.
+
+    Args:
+        files (list): (file path, processing mode) pairs
+        api_urls (dict): Endpoint URL for each processing mode
+        return_media (bool): If True, request and save the processed media
+        params (dict): Query parameters for each processing mode
+        concurrency (int): Maximum number of files in flight at once
+
+    Returns:
+        dict: Dictionary with file paths as keys and detection results as values
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def process_one(session: aiohttp.ClientSession, file_path: str, mode: str) -> Any:
+        # A file that fails is reported on its own so the rest of the run still completes
+        try:
+            async with semaphore:
+                logger.info("Processing %s: %s", mode, _pinfo(file_path).name)
+                response = await detect_pose_async(
+                    session, file_path, api_urls[mode], mode, return_media, params[mode]
+                )
+
+            result, media = response if return_media else (response, None)
+            process = _DISPATCH[mode][1]
+            # Writing the result files is blocking, keep it off the event loop
+            summary = await loop.run_in_executor(None, process, result, file_path, media)
+            logger.info("\n%s", summary)
+            return result
+        except Exception as e:
+            logger.error("Error processing %s %s: %s", mode, _pinfo(file_path).name, e)
+            return {"detail": str(e)}
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        results = await asyncio.gather(*(process_one(session, path, mode) for path, mode in files))
+
+    return {path: result for (path, _), result in zip(files, results)}
+
+
+def process_pose_directory(
+    directory_path: str,
+    mode: str = 'auto',
+    api_url: Optional[str] = None,
+    return_media: bool = False,
+    save_media: bool = False,
+    save_results: bool = False,
+    concurrency: int = 8
+) -> Dict[str, Any]:
+    """
+    Process all images and videos in a directory concurrently.
+
+    Args:
+        directory_path (str): Path to the directory containing images and videos
+        mode (str): Processing mode: auto, image, or video
+        api_url (str): URL of the pose detection endpoint (defaults to the one for each mode)
+        return_media (bool): If True, request and save the processed images/videos
+        save_media (bool): If True, save processed images/videos on the server
+        save_results (bool): If True, request to save detailed results in JSON file
+        concurrency (int): Maximum number of files sent to the API at once
+
+    Returns:
+        dict: Dictionary with file paths as keys and detection results as values
+    """
+    if not os.path.isdir(directory_path):
+        raise NotADirectoryError(f"Directory not found: {directory_path}")
+
+    # Pick the files to process and the mode for each of them
+    files = []
+    with os.scandir(directory_path) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            file_ext = os.path.splitext(entry.name)[1].lower()
+            if file_ext in _IMAGE_EXTS and mode != 'video':
+                file_mode = 'image'
+            elif file_ext in _VIDEO_EXTS and mode != 'image':
+                file_mode = 'video'
+            else:
+                continue
+            if entry.is_file() and not entry.name.endswith(('_pose_processed.jpg', '_pose_processed.mp4')):
+                files.append((entry.path, file_mode))
+
+    if not files:
+        logger.info("No files to process found in %s", directory_path)
+        return {}
+
+    logger.info("Found %d files to process in %s", len(files), directory_path)
+
+    api_urls = {
+        file_mode: api_url or f"http://localhost:8001/detect/pose/{file_mode}"
+        for file_mode in _MEDIA_FIELDS
+    }
+
+    params = {}
+    for file_mode in _MEDIA_FIELDS:
+        params[file_mode] = {}
+        if save_media:
+            params[file_mode][f'save_{file_mode}'] = 'true'
+        if save_results:
+            params[file_mode]['save_results'] = 'true'
+
+    return asyncio.run(_process_files_async(files, api_urls, return_media, params, concurrency))
 
 
 if __name__ == "__main__":
+    # Imported here so library users of this module do not pay for it
+    import argparse
+
     # Set up argument parser
     parser = argparse.ArgumentParser(description='Detect human poses in an image or video')
-    parser.add_argument('file_path', help='Path to the image or video file')
+    parser.add_argument('file_path', help='Path to the image or video file, or a directory of them')
     parser.add_argument('--url', help='URL of the pose detection API endpoint')
     parser.add_argument('--return-media', action='store_true',
                         help='Return and save the processed image/video with pose markers')
@@ -337,74 +1083,76 @@ if __name__ == "__main__":
                         help='Save detailed results in JSON on server')
     parser.add_argument('--mode', choices=['auto', 'image', 'video'], default='auto',
                         help='Processing mode: auto, image, or video')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Maximum number of files sent to the API at once in directory mode')
     
     # Parse arguments
     args = parser.parse_args()
+
+    # Log progress messages to stdout as plain lines
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
     file_path = args.file_path
-    file_ext = Path(file_path).suffix.lower()
-    
-    # Determine processing mode
-    mode = args.mode
-    if mode == 'auto':
-        if file_ext in ['.jpg', '.jpeg', '.png']:
-            mode = 'image'
-        elif file_ext in ['.mp4', '.avi', '.mov', '.wmv', '.mkv']:
-            mode = 'video'
-        else:
-            print(f"Warning: Cannot determine file type from extension '{file_ext}'. Using 'image' mode.")
-            mode = 'image'
-    
-    print(f"Processing mode: {mode}")
-    
-    # Set default URL based on mode
-    if args.url:
-        api_url = args.url
+
+    if os.path.isdir(file_path):
+        # Process every image and video in a directory concurrently
+        process_pose_directory(
+            file_path,
+            args.mode,
+            args.url,
+            args.return_media,
+            args.save_media,
+            args.save_results,
+            args.concurrency
+        )
     else:
-        api_url = f"http://localhost:8001/detect/pose/{mode}"
-    
-    try:
-        # Process based on mode
-        if mode == 'image':
-            if args.return_media:
-                result, image_bytes = detect_pose_in_image(
-                    file_path, 
-                    api_url, 
-                    True, 
-                    args.save_media,
-                    args.save_results
-                )
-                summary = process_pose_result(result, file_path, image_bytes)
+        file_info = _pinfo(file_path)
+        file_ext = file_info.suffix
+
+        # Determine processing mode
+        mode = args.mode
+        if mode == 'auto':
+            if file_ext in _IMAGE_EXTS:
+                mode = 'image'
+            elif file_ext in _VIDEO_EXTS:
+                mode = 'video'
             else:
-                result = detect_pose_in_image(
-                    file_path, 
-                    api_url, 
-                    False, 
-                    args.save_media,
-                    args.save_results
-                )
-                summary = process_pose_result(result, file_path)
-        else:  # video mode
+                logger.warning("Warning: Cannot determine file type from extension '%s'. Using 'image' mode.", file_ext)
+                mode = 'image'
+
+        logger.info("Processing mode: %s", mode)
+
+        # Set default URL based on mode
+        if args.url:
+            api_url = args.url
+        else:
+            api_url = f"http://localhost:8001/detect/pose/{mode}"
+
+        try:
+            # Process based on mode
+            detect, summarize, processed_ext = _DISPATCH[mode]
             if args.return_media:
-                result, video_bytes = detect_pose_in_video(
-                    file_path, 
-                    api_url, 
-                    True, 
+                # Stream the processed media straight into its output file
+                result, media_bytes = detect(
+                    file_path,
+                    api_url,
+                    True,
                     args.save_media,
-                    args.save_results
+                    args.save_results,
+                    media_path=str(file_info.parent / f"{file_info.stem}_pose_processed{processed_ext}")
                 )
-                summary = process_pose_video_result(result, file_path, video_bytes)
             else:
-                result = detect_pose_in_video(
-                    file_path, 
-                    api_url, 
-                    False, 
+                result = detect(
+                    file_path,
+                    api_url,
+                    False,
                     args.save_media,
                     args.save_results
                 )
-                summary = process_pose_video_result(result, file_path)
-        
-        # Print the summary
-        print("\n" + summary)
-        
-    except Exception as e:
-        print(f"Error processing file: {e}")
+                media_bytes = None
+            summary = summarize(result, file_path, media_bytes)
+
+            # Print the summary
+            print("\n" + summary)
+
+        except Exception as e:
+            logger.error("Error processing file: %s", e)
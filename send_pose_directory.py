@@ -3,14 +3,377 @@ Script for processing multiple files in a directory with the pose detection API.
 This utility allows users to send multiple images or videos from a directory
 to the pose detection API and retrieve the detection results.
 """
+import asyncio
+import aiohttp
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartDecoder, MultipartEncoder
+from urllib3.util.retry import Retry
+import io
 import json
+import logging
+import mmap
 import os
-import argparse
+import queue
+import sys
+import uuid
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+import threading
 import time
 import shutil
-from typing import Dict, List, Tuple, Optional, Union, Any
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack, contextmanager, nullcontext
+from urllib.parse import urlencode, urlparse
+from typing import BinaryIO, Dict, Iterator, List, Tuple, Optional, Union, Any
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library parser/encoder
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Decoder used for API responses and cached results
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def create_session(pool_connections: int = 16, pool_maxsize: int = 64) -> requests.Session:
+    """
+    Create a requests session with HTTP keep-alive and connection pooling.
+
+    Args:
+        pool_connections (int): Number of host pools to keep
+        pool_maxsize (int): Maximum number of pooled connections per host
+
+    Returns:
+        requests.Session: Session with retrying adapters mounted for http and https
+    """
+    # Retry uploads answered by a busy or restarting server with exponential backoff.
+    # The last response is returned rather than raised so its error details are kept.
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=["POST"],
+        raise_on_status=False
+    )
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Shared session so consecutive files reuse the same connection
+_SESSION = create_session()
+
+# Size of the blocks a processed video is written to disk in
+MEDIA_DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Files up to this size are read into memory once when they may have to be uploaded twice
+IN_MEMORY_UPLOAD_LIMIT = 32 << 20
+
+# Responses are cached in this directory under the output directory, keyed by
+# file path, size and modification time
+CACHE_DIR_NAME = ".pose_cache"
+
+
+def _save_streamed(response: requests.Response, path: Union[str, Path]) -> int:
+    """Write a streamed response body to a file chunk by chunk and return its size."""
+    size = 0
+    with open(path, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=MEDIA_DOWNLOAD_CHUNK_SIZE):
+            f.write(chunk)
+            size += len(chunk)
+    return size
+
+
+class _MappedReader:
+    """
+    Reads a memory-mapped file from the start for MultipartEncoder.
+
+    The encoder tells how much of a part is left from its length, which for
+    an mmap is always the full size, so the remaining length is exposed here.
+    """
+
+    def __init__(self, mapped: mmap.mmap):
+        self._mapped = mapped
+        self._mapped.seek(0)
+
+    @property
+    def len(self) -> int:
+        return len(self._mapped) - self._mapped.tell()
+
+    def read(self, size: int = -1) -> bytes:
+        return self._mapped.read(size)
+
+
+class _RewindableMultipart:
+    """
+    Multipart/form-data body streamed by MultipartEncoder.
+
+    The encoder reads the file a block at a time, so large videos are never
+    held in memory. It can only be read once though; seeking back to the
+    start builds a fresh encoder with the same boundary so urllib3 can
+    resend the whole body when it retries a request.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        field_name: str,
+        filename: str,
+        content_type: str,
+        file_data: Optional[Union[bytes, mmap.mmap]] = None
+    ):
+        self._fields = (field_name, filename, file_path, content_type)
+        self._file_data = file_data
+        self._boundary = uuid.uuid4().hex
+        self._file_handle = None
+        self._start()
+
+    def _start(self) -> None:
+        field_name, filename, file_path, content_type = self._fields
+        if isinstance(self._file_data, mmap.mmap):
+            # A mapped file is read like a file, from the start on every pass
+            body = _MappedReader(self._file_data)
+        elif self._file_data is not None:
+            body = self._file_data
+        else:
+            body = self._file_handle = open(file_path, 'rb')
+        self._encoder = MultipartEncoder(
+            fields={field_name: (filename, body, content_type)},
+            boundary=self._boundary
+        )
+        self._position = 0
+
+    @property
+    def content_type(self) -> str:
+        return self._encoder.content_type
+
+    @property
+    def len(self) -> int:
+        return self._encoder.len
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._encoder.read(size)
+        self._position += len(chunk)
+        return chunk
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> None:
+        if offset != 0 or whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("multipart body can only be rewound to the start")
+        self.close()
+        self._start()
+
+    def close(self) -> None:
+        if self._file_handle is not None:
+            self._file_handle.close()
+            self._file_handle = None
+
+
+def _post_streamed(
+    session: requests.Session,
+    api_url: str,
+    file_path: str,
+    field_name: str,
+    content_type: str,
+    params: Dict[str, str],
+    file_data: Optional[Union[bytes, mmap.mmap]] = None
+) -> requests.Response:
+    """
+    Upload a file as multipart form data and leave the response body unread.
+
+    Args:
+        session (requests.Session): Session to send the request with
+        api_url (str): URL of the pose detection endpoint
+        file_path (str): Path to the file to upload
+        field_name (str): Name of the form field ('image' or 'video')
+        content_type (str): Content type of the file
+        params (dict): Query parameters
+        file_data (bytes): Contents of the file if already read or mapped, otherwise it is streamed from disk
+
+    Returns:
+        requests.Response: Response opened with stream=True
+    """
+    body = _RewindableMultipart(file_path, field_name, Path(file_path).name, content_type, file_data)
+    try:
+        return session.post(
+            api_url, data=body, headers={'Content-Type': body.content_type}, params=params, stream=True
+        )
+    finally:
+        body.close()
+
+
+def _decode_mixed_response(content_type: str, body: bytes) -> Optional[Tuple[Dict, Optional[bytes]]]:
+    """
+    Split a multipart/mixed response into the JSON result and the processed media.
+
+    Servers that support it answer a return_image / return_video request with
+    both parts at once, so the file does not have to be uploaded again for
+    the JSON data.
+
+    Args:
+        content_type (str): Content-Type header of the response, including the boundary
+        body (bytes): Response body
+
+    Returns:
+        Optional[Tuple[Dict, Optional[bytes]]]: (JSON result, media bytes), or None if
+            the response is not multipart/mixed or has no JSON part
+    """
+    if not content_type.startswith('multipart/mixed'):
+        return None
+
+    json_response, media_bytes = None, None
+    for part in MultipartDecoder(body, content_type).parts:
+        part_type = part.headers.get(b'Content-Type', b'').decode()
+        if part_type.startswith('application/json'):
+            json_response = _json_loads(part.content)
+        else:
+            media_bytes = part.content
+
+    if json_response is None:
+        return None
+    return json_response, media_bytes
+
+
+@contextmanager
+def _upload_buffer(file_path: str) -> Iterator[Union[bytes, mmap.mmap]]:
+    """
+    Provide the contents of a file that may have to be uploaded twice.
+
+    Small files are read into memory. Larger ones are memory-mapped, so both
+    uploads are served from the same pages without copying the whole file
+    into the process.
+    """
+    if os.path.getsize(file_path) <= IN_MEMORY_UPLOAD_LIMIT:
+        yield Path(file_path).read_bytes()
+        return
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        yield mapped
+
+
+def _read_small_file(file_path: str) -> Optional[bytes]:
+    """Read a file that may be uploaded twice into memory, unless it is too large for that."""
+    if os.path.getsize(file_path) > IN_MEMORY_UPLOAD_LIMIT:
+        return None
+    return Path(file_path).read_bytes()
+
+
+def detect_media(
+    file_path: str,
+    api_url: str,
+    field_name: str,
+    content_type: str,
+    return_media: bool = False,
+    save_media: bool = False,
+    save_results: bool = False,
+    session: Optional[requests.Session] = None,
+    media_path: Optional[str] = None
+) -> Union[Dict, Tuple[Dict, Optional[bytes]]]:
+    """
+    Send an image or video to a pose detection endpoint and return the JSON response.
+
+    Args:
+        file_path (str): Path to the media file
+        api_url (str): URL of the pose detection endpoint
+        field_name (str): Kind of media and name of its form field ('image' or 'video')
+        content_type (str): Content type of the file
+        return_media (bool): If True, also return the processed media with marked poses
+        save_media (bool): If True, save the processed media on the server
+        save_results (bool): If True, save detailed results to JSON on server
+        session (requests.Session): Optional session to send requests with (defaults to a shared one)
+        media_path (str): If given with return_media=True, stream the processed media into this file
+
+    Returns:
+        Union[Dict, Tuple[Dict, Optional[bytes]]]: 
+            - If return_media=False: JSON response with detection results
+            - If return_media=True: Tuple of (JSON response, media bytes), the bytes
+              being None when the media was written to media_path or could not be retrieved
+    """
+    # Check if the file exists
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"{field_name.capitalize()} file not found: {file_path}")
+
+    if session is None:
+        session = _SESSION
+
+    name = Path(file_path).name
+
+    # Set up parameters
+    params = {}
+    if save_media:
+        params[f'save_{field_name}'] = 'true'
+    if save_results:
+        params['save_results'] = 'true'
+
+    try:
+        if not return_media:
+            # Just return the JSON result
+            response = _post_streamed(session, api_url, file_path, field_name, content_type, params)
+            response.raise_for_status()
+            return response.json()
+
+        # Hold the file in memory, or map it when large, so a second request
+        # sends the same buffer instead of reading the file again
+        with _upload_buffer(file_path) as file_data:
+            # Ask for the result and the processed media in a single request
+            response = _post_streamed(
+                session, api_url, file_path, field_name, content_type,
+                {**params, f'return_{field_name}': 'true'}, file_data
+            )
+            response.raise_for_status()
+            response_type = response.headers.get('content-type', '')
+
+            # Only a multipart answer is read into memory here, bare media is streamed below
+            combined = None
+            if response_type.startswith('multipart/mixed'):
+                combined = _decode_mixed_response(response_type, response.content)
+            if combined is not None:
+                json_result, media_bytes = combined
+                if media_path is not None and media_bytes is not None:
+                    _write_bytes(media_path, media_bytes)
+                    media_bytes = None
+                return json_result, media_bytes
+
+            if response_type == 'application/json':
+                logger.warning("Warning: Received JSON instead of %s for %s", field_name, name)
+                return response.json(), None
+
+            # The server sent only the media, write it out before the second request
+            if media_path is not None:
+                _save_streamed(response, media_path)
+                media_bytes = None
+            else:
+                media_bytes = response.content
+
+            # Get the JSON data with a second request
+            json_response = _post_streamed(session, api_url, file_path, field_name, content_type, params, file_data)
+            json_response.raise_for_status()
+            return json_response.json(), media_bytes
+
+    except requests.exceptions.RequestException as e:
+        logger.error("Error making request for %s: %s", name, e)
+        
+        # Try to extract error details
+        error_json = {"detail": str(e)}
+        if hasattr(e, 'response') and e.response is not None:
+            try:
+                error_json = e.response.json()
+            except:
+                pass
+        
+        return (error_json, None) if return_media else error_json
 
 
 def detect_pose_in_image(
@@ -18,171 +381,712 @@ def detect_pose_in_image(
     api_url: str = "http://localhost:8001/detect/pose/image",
     return_image: bool = False,
     save_image: bool = False,
-    save_results: bool = False
-) -> Union[Dict, Tuple[Dict, bytes]]:
+    save_results: bool = False,
+    session: Optional[requests.Session] = None,
+    media_path: Optional[str] = None
+) -> Union[Dict, Tuple[Dict, Optional[bytes]]]:
+    """Send an image to the pose detection endpoint, see detect_media."""
+    return detect_media(
+        image_path, api_url, 'image', 'image/jpeg', return_image, save_image, save_results, session, media_path
+    )
+
+
+def detect_pose_in_video(
+    video_path: str,
+    api_url: str = "http://localhost:8001/detect/pose/video",
+    return_video: bool = False,
+    save_video: bool = False,
+    save_results: bool = False,
+    session: Optional[requests.Session] = None,
+    media_path: Optional[str] = None
+) -> Union[Dict, Tuple[Dict, Optional[bytes]]]:
+    """Send a video to the pose detection endpoint, see detect_media."""
+    return detect_media(
+        video_path, api_url, 'video', 'video/mp4', return_video, save_video, save_results, session, media_path
+    )
+
+
+async def _post_file_async(
+    session: aiohttp.ClientSession,
+    api_url: str,
+    file_path: str,
+    field_name: str,
+    content_type: str,
+    params: Dict[str, str],
+    file_data: Optional[bytes] = None,
+    media_path: Optional[str] = None
+) -> Tuple[int, str, Optional[bytes]]:
     """
-    Send an image to the pose detection endpoint and return the JSON response.
+    Upload a media file to the API as multipart form data with aiohttp.
 
     Args:
-        image_path (str): Path to the image file
+        session (aiohttp.ClientSession): Session used to send the request
         api_url (str): URL of the pose detection endpoint
-        return_image (bool): If True, also return the processed image with marked poses
-        save_image (bool): If True, save the processed image on the server
-        save_results (bool): If True, save detailed results to JSON on server
+        file_path (str): Path to the file to upload
+        field_name (str): Name of the form field ('image' or 'video')
+        content_type (str): Content type of the file
+        params (dict): Query parameters
+        file_data (bytes): Contents of the file if already read, otherwise it is streamed from disk
+        media_path (str): If given, a successful media response is streamed into this file
 
     Returns:
-        Union[Dict, Tuple[Dict, bytes]]: 
-            - If return_image=False: JSON response with detection results
-            - If return_image=True: Tuple of (JSON response, image bytes)
+        Tuple[int, str, Optional[bytes]]: Status code, full Content-Type header and body of the
+            response, the body being None when it was written to media_path
     """
-    # Check if the file exists
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image file not found: {image_path}")
+    with (nullcontext(file_data) if file_data is not None else open(file_path, 'rb')) as payload:
+        form = aiohttp.FormData()
+        form.add_field(field_name, payload, filename=Path(file_path).name, content_type=content_type)
+        async with session.post(api_url, data=form, params=params) as response:
+            response_type = response.headers.get('Content-Type', '')
+            if (media_path is None or response.status >= 400
+                    or response_type.startswith(('application/json', 'multipart/mixed'))):
+                return response.status, response_type, await response.read()
 
-    # Prepare the files for upload
-    with open(image_path, 'rb') as file_handle:
-        files = {
-            'image': (Path(image_path).name, file_handle, 'image/jpeg')
-        }
+            loop = asyncio.get_running_loop()
+            with open(media_path, 'wb') as f:
+                async for chunk in response.content.iter_chunked(MEDIA_DOWNLOAD_CHUNK_SIZE):
+                    await loop.run_in_executor(None, f.write, chunk)
+            return response.status, response_type, None
 
-        # Set up parameters
-        params = {}
-        if save_image:
-            params['save_image'] = 'true'
-        if save_results:
-            params['save_results'] = 'true'
 
+async def detect_media_async(
+    session: aiohttp.ClientSession,
+    file_path: str,
+    api_url: str,
+    field_name: str,
+    content_type: str,
+    return_media: bool = False,
+    save_media: bool = False,
+    save_results: bool = False,
+    media_path: Optional[str] = None
+) -> Union[Dict, Tuple[Dict, Optional[bytes]]]:
+    """
+    Asynchronous counterpart of detect_media for use with aiohttp.
+
+    Args:
+        session (aiohttp.ClientSession): Session used to send the requests
+        file_path (str): Path to the media file
+        api_url (str): URL of the pose detection endpoint
+        field_name (str): Kind of media and name of its form field ('image' or 'video')
+        content_type (str): Content type of the file
+        return_media (bool): If True, also return the processed media with marked poses
+        save_media (bool): If True, save the processed media on the server
+        save_results (bool): If True, save detailed results to JSON on server
+        media_path (str): If given with return_media=True, stream the processed media into this file
+
+    Returns:
+        Union[Dict, Tuple[Dict, Optional[bytes]]]: 
+            - If return_media=False: JSON response with detection results
+            - If return_media=True: Tuple of (JSON response, media bytes), the bytes
+              being None when the media was written to media_path or could not be retrieved
+    """
+    name = Path(file_path).name
+
+    # Set up parameters
+    params = {}
+    if save_media:
+        params[f'save_{field_name}'] = 'true'
+    if save_results:
+        params['save_results'] = 'true'
+
+    if not return_media:
+        # Just return the JSON result
         try:
-            # First make a call to get the JSON data
-            response = requests.post(api_url, files=files, params=params)
-            response.raise_for_status()
-            json_response = response.json()
-            
-            # If return_image is True, make a second call to get the image
-            if return_image:
-                # Reopen the file for the second request
-                with open(image_path, 'rb') as file_handle:
-                    files = {
-                        'image': (Path(image_path).name, file_handle, 'image/jpeg')
-                    }
-                    # Add return_image parameter
-                    img_params = params.copy()
-                    img_params['return_image'] = 'true'
-                    
-                    try:
-                        # Send request with return_image parameter
-                        img_response = requests.post(api_url, files=files, params=img_params)
-                        img_response.raise_for_status()
-                        
-                        # Check if we got an image or an error
-                        if img_response.headers.get('content-type') == 'application/json':
-                            print(f"Warning: Received JSON instead of image for {Path(image_path).name}: {img_response.text}")
-                            return json_response, None
-                        
-                        # Return both the JSON data and image bytes
-                        return json_response, img_response.content
-                    except requests.exceptions.RequestException as e:
-                        print(f"Error getting processed image for {Path(image_path).name}: {e}")
-                        return json_response, None
-            else:
-                # Just return the JSON result
-                return json_response
-
-        except requests.exceptions.RequestException as e:
-            print(f"Error making request for {Path(image_path).name}: {e}")
-            
-            # Try to extract error details
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    error_json = e.response.json()
-                    return error_json
-                except:
-                    pass
-            
+            _, _, body = await _post_file_async(session, api_url, file_path, field_name, content_type, params)
+            return _json_loads(body)
+        except (aiohttp.ClientError, ValueError) as e:
+            logger.error("Error making request for %s: %s", name, e)
             return {"detail": str(e)}
 
+    try:
+        # Read the file once if it is small, a second request may have to send it again
+        loop = asyncio.get_running_loop()
+        file_data = await loop.run_in_executor(None, _read_small_file, file_path)
 
-def detect_pose_in_video(
+        # Ask for the result and the processed media in a single request
+        status, response_type, body = await _post_file_async(
+            session, api_url, file_path, field_name, content_type,
+            {**params, f'return_{field_name}': 'true'}, file_data, media_path
+        )
+        combined = _decode_mixed_response(response_type, body) if body is not None else None
+        if combined is not None:
+            json_response, media_bytes = combined
+            if media_path is not None and media_bytes is not None:
+                await loop.run_in_executor(None, _write_bytes, media_path, media_bytes)
+                logger.info("  - Saved processed %s to %s", field_name, media_path)
+                media_bytes = None
+            return json_response, media_bytes
+
+        if response_type.startswith('application/json'):
+            logger.warning(
+                "Warning: Received JSON instead of %s for %s: %s", field_name, name, body.decode(errors='replace')
+            )
+            return _json_loads(body), None
+
+        # The server sent only the media, get the JSON data with a second request
+        media_bytes = body if status < 400 else None
+        _, _, body = await _post_file_async(
+            session, api_url, file_path, field_name, content_type, params, file_data
+        )
+        json_response = _json_loads(body)
+    except (aiohttp.ClientError, OSError, ValueError) as e:
+        logger.error("Error making request for %s: %s", name, e)
+        return {"detail": str(e)}, None
+
+    if status >= 400:
+        logger.warning("Warning: Received status %s instead of %s for %s", status, field_name, name)
+    elif media_bytes is None:
+        logger.info("  - Saved processed %s to %s", field_name, media_path)
+
+    # Return both the JSON data and media bytes
+    return json_response, media_bytes
+
+
+async def detect_pose_in_image_async(
+    session: aiohttp.ClientSession,
+    image_path: str,
+    api_url: str = "http://localhost:8001/detect/pose/image",
+    return_image: bool = False,
+    save_image: bool = False,
+    save_results: bool = False,
+    media_path: Optional[str] = None
+) -> Union[Dict, Tuple[Dict, Optional[bytes]]]:
+    """Asynchronous counterpart of detect_pose_in_image, see detect_media_async."""
+    return await detect_media_async(
+        session, image_path, api_url, 'image', 'image/jpeg', return_image, save_image, save_results, media_path
+    )
+
+
+async def detect_pose_in_video_async(
+    session: aiohttp.ClientSession,
     video_path: str,
     api_url: str = "http://localhost:8001/detect/pose/video",
     return_video: bool = False,
     save_video: bool = False,
+    save_results: bool = False,
+    media_path: Optional[str] = None
+) -> Union[Dict, Tuple[Dict, Optional[bytes]]]:
+    """Asynchronous counterpart of detect_pose_in_video, see detect_media_async."""
+    return await detect_media_async(
+        session, video_path, api_url, 'video', 'video/mp4', return_video, save_video, save_results, media_path
+    )
+
+
+async def detect_poses_in_batch_async(
+    session: aiohttp.ClientSession,
+    image_paths: List[str],
+    api_url: str = "http://localhost:8001/detect/pose/image/batch",
+    save_image: bool = False,
     save_results: bool = False
-) -> Union[Dict, Tuple[Dict, bytes]]:
+) -> List[Dict]:
     """
-    Send a video to the pose detection endpoint and return the JSON response.
+    Send several images in one request to the batch pose detection endpoint.
+
+    The endpoint receives every image as an `images` multipart field and
+    returns a JSON array with one detection result per image, in order.
 
     Args:
-        video_path (str): Path to the video file
-        api_url (str): URL of the pose detection endpoint
-        return_video (bool): If True, also return the processed video with marked poses
-        save_video (bool): If True, save the processed video on the server
+        session (aiohttp.ClientSession): Session used to send the request
+        image_paths (list): Paths to the image files
+        api_url (str): URL of the batch pose detection endpoint
+        save_image (bool): If True, save the processed images on the server
         save_results (bool): If True, save detailed results to JSON on server
 
     Returns:
-        Union[Dict, Tuple[Dict, bytes]]: 
-            - If return_video=False: JSON response with detection results
-            - If return_video=True: Tuple of (JSON response, video bytes)
+        list: Detection results aligned with image_paths
     """
-    # Check if the file exists
-    if not os.path.exists(video_path):
-        raise FileNotFoundError(f"Video file not found: {video_path}")
+    # Set up parameters
+    params = {}
+    if save_image:
+        params['save_image'] = 'true'
+    if save_results:
+        params['save_results'] = 'true'
 
-    # Prepare the files for upload
-    with open(video_path, 'rb') as file_handle:
-        files = {
-            'video': (Path(video_path).name, file_handle, 'video/mp4')
-        }
+    try:
+        with ExitStack() as stack:
+            form = aiohttp.FormData()
+            for image_path in image_paths:
+                file_handle = stack.enter_context(open(image_path, 'rb'))
+                form.add_field('images', file_handle, filename=Path(image_path).name, content_type='image/jpeg')
+            async with session.post(api_url, data=form, params=params) as response:
+                json_response = _json_loads(await response.read())
+    except (aiohttp.ClientError, ValueError) as e:
+        logger.error("Error making batch request for %d images: %s", len(image_paths), e)
+        json_response = {"detail": str(e)}
 
-        # Set up parameters
-        params = {}
-        if save_video:
-            params['save_video'] = 'true'
-        if save_results:
-            params['save_results'] = 'true'
-        if return_video:
-            params['return_video'] = 'true'
+    if isinstance(json_response, list) and len(json_response) == len(image_paths):
+        return json_response
 
-        try:
-            # Make the request
-            response = requests.post(api_url, files=files, params=params)
-            response.raise_for_status()
-            
-            # Check if we got a video or JSON
-            if response.headers.get('content-type') == 'video/mp4':
-                # For return_video=true, we've received the video directly
-                
-                # Make a second request to get the JSON data
-                with open(video_path, 'rb') as file_handle:
-                    files = {
-                        'video': (Path(video_path).name, file_handle, 'video/mp4')
-                    }
-                    # Remove return_video flag to get JSON
-                    json_params = params.copy()
-                    json_params.pop('return_video', None)
-                    
-                    json_response = requests.post(api_url, files=files, params=json_params)
-                    json_response.raise_for_status()
-                    json_data = json_response.json()
-                
-                return json_data, response.content
-            else:
-                # Parse JSON response
-                json_response = response.json()
-                return json_response
-
-        except requests.exceptions.RequestException as e:
-            print(f"Error making request for {Path(video_path).name}: {e}")
-            
-            # Try to extract error details
-            if hasattr(e, 'response') and e.response is not None:
+    # An error response applies to every image in the batch
+    return [json_response] * len(image_paths)
+
+
+def _write_json(path: Union[str, Path], data: Any) -> None:
+    """Write data to an indented JSON file, using orjson when it is available."""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+
+def _write_bytes(path: Union[str, Path], data: bytes) -> None:
+    """Write raw bytes to a file."""
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _json_line(data: Any) -> bytes:
+    """Encode data as one line of newline-delimited JSON."""
+    if orjson is not None:
+        return orjson.dumps(data) + b'\n'
+    return json.dumps(data).encode() + b'\n'
+
+
+def _summary_entry(file_path: Union[str, Path], result: Any) -> Dict[str, Any]:
+    """Pick the fields of a detection result that go into the per-file summary."""
+    if not isinstance(result, dict):
+        return {"file": str(file_path), "poses": 0, "actions": {}, "results_file": None, "media_path": None}
+    return {
+        "file": str(file_path),
+        "poses": result.get("count", 0),
+        "actions": result.get("detected_actions", {}),
+        "results_file": result.get("results_file"),
+        "media_path": result.get("image_path", result.get("video_path"))
+    }
+
+
+def _cache_key(file_path: Union[str, Path], api_url: str, options: Dict[str, Any]) -> str:
+    """
+    Build the cache key for a file from its metadata and the request that would be sent.
+
+    The file is only stat'ed, not read, so checking the cache costs nothing
+    next to the upload even for large videos. A file that is rewritten gets
+    a new modification time and is sent again.
+
+    Args:
+        file_path (str): Path to the media file
+        api_url (str): URL of the pose detection endpoint
+        options (dict): Request options that change the response
+
+    Returns:
+        str: Hex digest identifying the response
+    """
+    st = os.stat(file_path)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{os.path.abspath(file_path)}\0{st.st_size}\0{st.st_mtime_ns}".encode())
+    digest.update(f"\0{api_url}?{urlencode(sorted(options.items()))}".encode())
+    return digest.hexdigest()
+
+
+def _cache_load(cache_dir: Path, key: str, media_path: Optional[Path]) -> Optional[Dict]:
+    """
+    Look up a cached result and copy its processed media to media_path if one is wanted.
+
+    Returns:
+        Optional[Dict]: The cached JSON result, or None on a cache miss
+    """
+    result_file = cache_dir / f"{key}.json"
+    media_file = cache_dir / f"{key}.media"
+    if not result_file.is_file() or (media_path is not None and not media_file.is_file()):
+        return None
+
+    result = _json_loads(result_file.read_bytes())
+    if media_path is not None:
+        shutil.copyfile(media_file, media_path)
+    return result
+
+
+def _cache_store(cache_dir: Path, key: str, result: Dict, media_path: Optional[Path]) -> None:
+    """Store a result, and the processed media written to media_path, under key."""
+    if media_path is not None:
+        if not media_path.is_file():
+            return
+        shutil.copyfile(media_path, cache_dir / f"{key}.media.tmp")
+        os.replace(cache_dir / f"{key}.media.tmp", cache_dir / f"{key}.media")
+
+    # The result is written last so a lookup never finds it without its media
+    _write_json(cache_dir / f"{key}.json.tmp", result)
+    os.replace(cache_dir / f"{key}.json.tmp", cache_dir / f"{key}.json")
+
+
+def _cache_lookup(
+    cache_dir: Optional[Path],
+    file_path: Path,
+    api_url: str,
+    options: Dict[str, Any],
+    output_media: Optional[Path]
+) -> Tuple[Optional[str], Optional[Dict]]:
+    """Return the cache key of a file and its cached result, if caching is on and there is one."""
+    if cache_dir is None:
+        return None, None
+    cache_key = _cache_key(file_path, api_url, options)
+    result = _cache_load(cache_dir, cache_key, output_media)
+    if result is not None:
+        logger.info("  - Using cached result for %s", file_path.name)
+    return cache_key, result
+
+
+def _save_result(
+    output_directory: Path,
+    file_path: Path,
+    result: Any,
+    cache_dir: Optional[Path],
+    cache_key: Optional[str],
+    output_media: Optional[Path]
+) -> None:
+    """Write a file's result JSON and cache the response."""
+    # Save the individual result to a JSON file
+    _write_json(output_directory / f"{file_path.stem}_pose_result.json", result)
+
+    # Only successful responses are cached so failed files are retried next run
+    if cache_key is not None and isinstance(result, dict) and "detail" not in result:
+        _cache_store(cache_dir, cache_key, result, output_media)
+
+
+def _update_stats(
+    stats: Dict[str, Any],
+    file_path: Path,
+    result: Any,
+    results_log: Optional[BinaryIO]
+) -> None:
+    """Add a file's result to the statistics and append its summary entry."""
+    if isinstance(result, dict):
+        if "detail" in result:
+            stats["errors"].append({
+                "file": str(file_path),
+                "error": result["detail"]
+            })
+        else:
+            stats["total_poses_detected"] += result.get("count", 0)
+            stats["actions"].update(result.get("detected_actions") or {})
+
+    # Record the file in the summary as soon as it is done
+    if results_log is not None:
+        results_log.write(_json_line(_summary_entry(file_path, result)))
+
+
+def _record_failure(stats: Dict[str, Any], file_path: Path, kind: str, error: Exception) -> None:
+    """Report a file that could not be processed at all."""
+    logger.error("  - Error processing %s %s: %s", kind, file_path.name, error)
+    stats["errors"].append({
+        "file": str(file_path),
+        "error": str(error)
+    })
+
+
+def _is_local_url(url: str) -> bool:
+    """Tell whether an API URL points at this machine, where lookups cost nothing."""
+    return urlparse(url).hostname in ('localhost', '127.0.0.1', '::1')
+
+
+class _RateLimiter:
+    """
+    Token bucket that spreads requests out to an average rate.
+
+    Up to one second's worth of requests may start back to back after an
+    idle period, after which each caller waits only for as long as it takes
+    the bucket to refill. Time spent on requests counts towards that wait,
+    unlike a fixed sleep after every file. Usable from threads with wait()
+    and from coroutines with ``async with``. Without a rate it never waits.
+    """
+
+    def __init__(self, rate: Optional[float]):
+        self._rate = rate
+        self._capacity = max(1.0, rate or 0.0)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token and return how long to wait until it is actually available."""
+        if not self._rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            self._tokens -= 1
+            return -self._tokens / self._rate if self._tokens < 0 else 0.0
+
+    def wait(self) -> None:
+        pause = self._reserve()
+        if pause > 0:
+            time.sleep(pause)
+
+    async def __aenter__(self) -> None:
+        pause = self._reserve()
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+
+async def _process_files_async(
+    image_files: List[Path],
+    video_files: List[Path],
+    api_url_image: str,
+    api_url_video: str,
+    output_directory: Path,
+    processed_dir: Optional[Path],
+    save_media: bool,
+    save_results: bool,
+    stats: Dict[str, Any],
+    concurrency: int,
+    rate: Optional[float],
+    cache_dir: Optional[Path] = None,
+    results_log: Optional[BinaryIO] = None,
+    batch_size: int = 1,
+    batch_url: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Send images and videos to the pose detection API concurrently.
+
+    Results and processed media are written as each file completes, and the
+    pose, action and error statistics are updated in place.
+
+    Args:
+        image_files (list): Images to process
+        video_files (list): Videos to process
+        api_url_image (str): URL of the pose detection image endpoint
+        api_url_video (str): URL of the pose detection video endpoint
+        output_directory (Path): Directory to write the per-file results to
+        processed_dir (Path): Directory for processed media, or None to not request it
+        save_media (bool): If True, save processed media on server
+        save_results (bool): If True, save detailed results in JSON on server
+        stats (dict): Statistics dictionary to update
+        concurrency (int): Maximum number of requests in flight at once
+        rate (float): Maximum average number of requests started per second, or None for no limit
+        cache_dir (Path): Directory of cached responses to reuse and fill, or None to always send
+        results_log (file): Binary file each file's summary entry is appended to as a JSON line
+        batch_size (int): Number of images per request to batch_url (1 disables batching)
+        batch_url (str): URL of the batch pose detection endpoint
+
+    Returns:
+        dict: Dictionary with file paths as keys and detection results as values
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = _RateLimiter(rate)
+    loop = asyncio.get_running_loop()
+    return_media = processed_dir is not None
+    cache_options = {'return_media': return_media, 'save_media': save_media, 'save_results': save_results}
+
+    # Dedicated pool so result writes do not block the event loop
+    writer = ThreadPoolExecutor(max_workers=2)
+
+    async def cached(file_path: Path, api_url: str, output_media: Optional[Path]) -> Tuple[Optional[str], Any]:
+        # Reuse the response from an earlier run on the unchanged file
+        return await loop.run_in_executor(
+            None, _cache_lookup, cache_dir, file_path, api_url, cache_options, output_media
+        )
+
+    async def record(
+        file_path: Path,
+        result: Any,
+        cache_key: Optional[str],
+        output_media: Optional[Path],
+        file_start_time: float
+    ) -> Tuple[str, Any]:
+        await loop.run_in_executor(
+            writer, _save_result, output_directory, file_path, result, cache_dir, cache_key, output_media
+        )
+        _update_stats(stats, file_path, result, results_log)
+        logger.info("  - Processing time for %s: %.2f seconds", file_path.name, time.time() - file_start_time)
+        return str(file_path), result
+
+    async def process_one(
+        session: aiohttp.ClientSession,
+        file_path: Path,
+        kind: str,
+        api_url: str,
+        content_type: str,
+        index: int,
+        total: int
+    ) -> List[Tuple[str, Any]]:
+        async with semaphore:
+            logger.info("Processing %s %d/%d: %s", kind, index, total, file_path.name)
+            file_start_time = time.time()
+
+            output_media = None
+            if return_media:
+                output_media = processed_dir / f"{file_path.stem}_processed{file_path.suffix}"
+
+            try:
+                cache_key, result = await cached(file_path, api_url, output_media)
+                if result is None:
+                    # Processed media is streamed straight into its output file
+                    async with limiter:
+                        response = await detect_media_async(
+                            session, str(file_path), api_url, kind, content_type,
+                            return_media, save_media, save_results,
+                            media_path=str(output_media) if return_media else None
+                        )
+                    result = response[0] if return_media else response
+
+                return [await record(file_path, result, cache_key, output_media, file_start_time)]
+            except Exception as e:
+                _record_failure(stats, file_path, kind, e)
+                return []
+
+    async def process_batch(
+        session: aiohttp.ClientSession, batch: List[Path], index: int, total: int
+    ) -> List[Tuple[str, Any]]:
+        async with semaphore:
+            logger.info("Processing images %d-%d/%d", index, index + len(batch) - 1, total)
+            batch_start_time = time.time()
+
+            try:
+                lookups = await asyncio.gather(*(cached(file_path, batch_url, None) for file_path in batch))
+                pending = [file_path for file_path, (_, result) in zip(batch, lookups) if result is None]
+
+                # Only the files without a cached result are sent, in one request
+                fresh = {}
+                if pending:
+                    async with limiter:
+                        batch_results = await detect_poses_in_batch_async(
+                            session, [str(file_path) for file_path in pending], batch_url, save_media, save_results
+                        )
+                    fresh = dict(zip(pending, batch_results))
+            except Exception as e:
+                for file_path in batch:
+                    _record_failure(stats, file_path, 'image', e)
+                return []
+
+            entries = []
+            for file_path, (cache_key, result) in zip(batch, lookups):
                 try:
-                    error_json = e.response.json()
-                    return error_json
-                except:
-                    pass
-            
-            return {"detail": str(e)}
+                    result = fresh.get(file_path, result)
+                    entries.append(await record(file_path, result, cache_key, None, batch_start_time))
+                except Exception as e:
+                    _record_failure(stats, file_path, 'image', e)
+            return entries
+
+    # A remote host is resolved once for the whole run instead of again every
+    # few seconds as new connections open
+    connector_options = {'limit': concurrency}
+    urls = [api_url_image, api_url_video] + ([batch_url] if batch_url else [])
+    if not all(_is_local_url(url) for url in urls):
+        connector_options['ttl_dns_cache'] = None
+    connector = aiohttp.TCPConnector(**connector_options)
+
+    # Videos can take a long time to process, so only the connection pool bounds the requests
+    timeout = aiohttp.ClientTimeout(total=None)
+    try:
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            # Images go out in batches when enabled, processed media needs one request per file
+            media = [('video', api_url_video, 'video/mp4', video_files)]
+            if batch_size > 1 and not return_media:
+                tasks = [
+                    process_batch(session, image_files[start:start + batch_size], start + 1, len(image_files))
+                    for start in range(0, len(image_files), batch_size)
+                ]
+            else:
+                tasks = []
+                media.insert(0, ('image', api_url_image, 'image/jpeg', image_files))
+            tasks.extend(
+                process_one(session, file_path, kind, api_url, content_type, i, len(files))
+                for kind, api_url, content_type, files in media
+                for i, file_path in enumerate(files, 1)
+            )
+            processed = await asyncio.gather(*tasks)
+    finally:
+        writer.shutdown(wait=True)
+
+    return dict(entry for entries in processed for entry in entries)
+
+
+def _process_files_threaded(
+    image_files: List[Path],
+    video_files: List[Path],
+    api_url_image: str,
+    api_url_video: str,
+    output_directory: Path,
+    processed_dir: Optional[Path],
+    save_media: bool,
+    save_results: bool,
+    stats: Dict[str, Any],
+    workers: int,
+    rate: Optional[float],
+    cache_dir: Optional[Path] = None,
+    results_log: Optional[BinaryIO] = None
+) -> Dict[str, Any]:
+    """
+    Send images and videos to the pose detection API from a pool of worker threads.
+
+    Uses requests and the shared session instead of aiohttp, for environments
+    where running an event loop is not an option. Each worker sends a file
+    and writes its result; statistics are updated as the files complete.
+
+    Args:
+        image_files (list): Images to process
+        video_files (list): Videos to process
+        api_url_image (str): URL of the pose detection image endpoint
+        api_url_video (str): URL of the pose detection video endpoint
+        output_directory (Path): Directory to write the per-file results to
+        processed_dir (Path): Directory for processed media, or None to not request it
+        save_media (bool): If True, save processed media on server
+        save_results (bool): If True, save detailed results in JSON on server
+        stats (dict): Statistics dictionary to update
+        workers (int): Number of worker threads, and so of requests in flight at once
+        rate (float): Maximum average number of requests started per second, or None for no limit
+        cache_dir (Path): Directory of cached responses to reuse and fill, or None to always send
+        results_log (file): Binary file each file's summary entry is appended to as a JSON line
+
+    Returns:
+        dict: Dictionary with file paths as keys and detection results as values
+    """
+    limiter = _RateLimiter(rate)
+    return_media = processed_dir is not None
+    cache_options = {'return_media': return_media, 'save_media': save_media, 'save_results': save_results}
+
+    def process_one(file_path: Path, kind: str, api_url: str, content_type: str, index: int, total: int):
+        logger.info("Processing %s %d/%d: %s", kind, index, total, file_path.name)
+        file_start_time = time.time()
+
+        output_media = None
+        if return_media:
+            output_media = processed_dir / f"{file_path.stem}_processed{file_path.suffix}"
+
+        cache_key, result = _cache_lookup(cache_dir, file_path, api_url, cache_options, output_media)
+        if result is None:
+            limiter.wait()
+            # Processed media is streamed straight into its output file
+            response = detect_media(
+                str(file_path), api_url, kind, content_type, return_media, save_media, save_results,
+                media_path=str(output_media) if return_media else None
+            )
+            result = response[0] if return_media else response
+
+        _save_result(output_directory, file_path, result, cache_dir, cache_key, output_media)
+        return result, file_start_time
+
+    media = [
+        ('image', api_url_image, 'image/jpeg', image_files),
+        ('video', api_url_video, 'video/mp4', video_files)
+    ]
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(process_one, file_path, kind, api_url, content_type, i, len(files)): (file_path, kind)
+            for kind, api_url, content_type, files in media
+            for i, file_path in enumerate(files, 1)
+        }
+
+        # Statistics are only touched from this thread
+        for future in as_completed(futures):
+            file_path, kind = futures[future]
+            try:
+                result, file_start_time = future.result()
+            except Exception as e:
+                _record_failure(stats, file_path, kind, e)
+                continue
+            _update_stats(stats, file_path, result, results_log)
+            logger.info("  - Processing time for %s: %.2f seconds", file_path.name, time.time() - file_start_time)
+            results[str(file_path)] = result
+
+    return results
 
 
 def process_directory(
@@ -191,12 +1095,18 @@ def process_directory(
     api_url_video: str = "http://localhost:8001/detect/pose/video",
     image_extensions: Tuple[str, ...] = ('.jpg', '.jpeg', '.png'),
     video_extensions: Tuple[str, ...] = ('.mp4', '.avi', '.mov', '.wmv', '.mkv'),
-    delay: float = 0.5,
+    delay: float = 0.0,
     output_dir: str = None,
     return_media: bool = False,
     save_media: bool = False,
     save_results: bool = False,
-    mode: str = 'both'
+    mode: str = 'both',
+    concurrency: int = 8,
+    rate: Optional[float] = None,
+    use_cache: bool = False,
+    batch_size: int = 1,
+    batch_url: Optional[str] = None,
+    workers: int = 0
 ) -> Dict[str, Any]:
     """
     Process all images and/or videos in a directory for pose detection.
@@ -207,12 +1117,20 @@ def process_directory(
         api_url_video (str): URL of the pose detection video endpoint
         image_extensions (tuple): File extensions for images to process
         video_extensions (tuple): File extensions for videos to process
-        delay (float): Delay between requests in seconds
+        delay (float): Average spacing between files in seconds, used when rate is not given
         output_dir (str): Optional directory to save results to (defaults to same as input)
         return_media (bool): If True, request and save processed media with detections
         save_media (bool): If True, save processed media on server
         save_results (bool): If True, save detailed results in JSON on server
         mode (str): Processing mode - 'image', 'video', or 'both'
+        concurrency (int): Maximum number of files sent to the API at once
+        rate (float): Maximum average number of files sent per second, or None for no limit
+        use_cache (bool): If True, reuse results cached by earlier runs for files whose path, size
+            and modification time are unchanged. The cache keeps a copy of any returned media
+            under the output directory
+        batch_size (int): Number of images sent per request to the batch endpoint (1 disables batching)
+        batch_url (str): URL of the batch endpoint (defaults to api_url_image with a "/batch" suffix)
+        workers (int): If above 0, send the files from this many threads with requests instead of aiohttp
 
     Returns:
         dict: Dictionary with file paths as keys and detection results as values
@@ -234,26 +1152,33 @@ def process_directory(
         processed_dir = output_directory / "processed_poses"
         processed_dir.mkdir(exist_ok=True)
     
-    # Find all media files in the directory
+    # Find all media files in the directory with a single listing
+    image_exts = {ext.lower() for ext in image_extensions} if mode in ['image', 'both'] else set()
+    video_exts = {ext.lower() for ext in video_extensions} if mode in ['video', 'both'] else set()
     image_files = []
     video_files = []
-    
-    if mode in ['image', 'both']:
-        for ext in image_extensions:
-            image_files.extend(directory.glob(f"*{ext}"))
-            image_files.extend(directory.glob(f"*{ext.upper()}"))
-    
-    if mode in ['video', 'both']:
-        for ext in video_extensions:
-            video_files.extend(directory.glob(f"*{ext}"))
-            video_files.extend(directory.glob(f"*{ext.upper()}"))
+
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            ext = os.path.splitext(entry.name)[1].lower()
+            if ext in image_exts:
+                files = image_files
+            elif ext in video_exts:
+                files = video_files
+            else:
+                continue
+            if entry.is_file():
+                files.append(Path(entry.path))
+
+    image_files.sort()
+    video_files.sort()
 
     total_files = len(image_files) + len(video_files)
     if total_files == 0:
-        print(f"No media files found in {directory_path} for mode '{mode}'")
+        logger.info("No media files found in %s for mode '%s'", directory_path, mode)
         return {}
 
-    print(f"Found {len(image_files)} images and {len(video_files)} videos to process in {directory_path}")
+    logger.info("Found %d images and %d videos to process in %s", len(image_files), len(video_files), directory_path)
 
     # Set up a stats dictionary
     stats = {
@@ -261,192 +1186,97 @@ def process_directory(
         "images_processed": len(image_files),
         "videos_processed": len(video_files),
         "total_poses_detected": 0,
-        "actions": {},
+        "actions": Counter(),
         "processing_time": 0,
         "errors": []
     }
     
-    # Process each file
+    if batch_size > 1 and (return_media or workers > 0) and image_files:
+        logger.warning("Batching is not supported with --return-media or --workers, sending images one at a time")
+
+    # A fixed delay between files is the same as a rate of one file per delay
+    if rate is None and delay > 0:
+        rate = 1.0 / delay
+
+    # Keep responses next to the results so re-runs skip unchanged files
+    cache_dir = None
+    if use_cache:
+        cache_dir = output_directory / CACHE_DIR_NAME
+        cache_dir.mkdir(exist_ok=True)
+
+    # Per-file entries are written as newline-delimited JSON while the files are processed
+    summary_path = output_directory / "pose_detection_summary.json"
+    results_path = summary_path.with_suffix('.ndjson')
+
+    # Process the files concurrently, on threads when asked to or with aiohttp
     start_time = time.time()
-    results = {}
-    
-    # Process images
-    for i, image_path in enumerate(sorted(image_files), 1):
-        print(f"Processing image {i}/{len(image_files)}: {image_path.name}")
-        image_start_time = time.time()
-        
-        try:
-            if return_media:
-                # Get both JSON and image
-                result, image_bytes = detect_pose_in_image(
-                    str(image_path), 
-                    api_url_image, 
-                    True, 
-                    save_media,
-                    save_results
-                )
-                
-                # Save processed image if available
-                if image_bytes:
-                    output_image = processed_dir / f"{image_path.stem}_processed{image_path.suffix}"
-                    with open(output_image, 'wb') as f:
-                        f.write(image_bytes)
-                    print(f"  - Saved processed image to {output_image}")
-            else:
-                # Get only JSON result
-                result = detect_pose_in_image(
-                    str(image_path), 
-                    api_url_image, 
-                    False, 
-                    save_media,
-                    save_results
-                )
-            
-            # Save the individual result to a JSON file
-            output_json = output_directory / f"{image_path.stem}_pose_result.json"
-            with open(output_json, 'w') as f:
-                json.dump(result, f, indent=2)
-            
-            # Add to results
-            results[str(image_path)] = result
-            
-            # Update statistics
-            if isinstance(result, dict):
-                if "detail" in result:
-                    stats["errors"].append({
-                        "file": str(image_path),
-                        "error": result["detail"]
-                    })
-                else:
-                    stats["total_poses_detected"] += result.get("count", 0)
-                    
-                    # Track actions
-                    if "detected_actions" in result and result["detected_actions"]:
-                        for action, count in result["detected_actions"].items():
-                            if action not in stats["actions"]:
-                                stats["actions"][action] = 0
-                            stats["actions"][action] += count
-            
-            image_time = time.time() - image_start_time
-            print(f"  - Processing time: {image_time:.2f} seconds")
-
-        except Exception as e:
-            print(f"  - Error processing image: {e}")
-            stats["errors"].append({
-                "file": str(image_path),
-                "error": str(e)
-            })
-        
-        # Add delay between requests
-        if i < len(image_files) and delay > 0:
-            time.sleep(delay)
-    
-    # Process videos
-    for i, video_path in enumerate(sorted(video_files), 1):
-        print(f"Processing video {i}/{len(video_files)}: {video_path.name}")
-        video_start_time = time.time()
-        
-        try:
-            if return_media:
-                # Get both JSON and video
-                result, video_bytes = detect_pose_in_video(
-                    str(video_path), 
-                    api_url_video, 
-                    True, 
-                    save_media,
-                    save_results
-                )
-                
-                # Save processed video if available
-                if video_bytes:
-                    output_video = processed_dir / f"{video_path.stem}_processed{video_path.suffix}"
-                    with open(output_video, 'wb') as f:
-                        f.write(video_bytes)
-                    print(f"  - Saved processed video to {output_video}")
-            else:
-                # Get only JSON result
-                result = detect_pose_in_video(
-                    str(video_path), 
-                    api_url_video, 
-                    False, 
-                    save_media,
-                    save_results
-                )
-            
-            # Save the individual result to a JSON file
-            output_json = output_directory / f"{video_path.stem}_pose_result.json"
-            with open(output_json, 'w') as f:
-                json.dump(result, f, indent=2)
-            
-            # Add to results
-            results[str(video_path)] = result
-            
-            # Update statistics
-            if isinstance(result, dict):
-                if "detail" in result:
-                    stats["errors"].append({
-                        "file": str(video_path),
-                        "error": result["detail"]
-                    })
-                else:
-                    stats["total_poses_detected"] += result.get("count", 0)
-                    
-                    # Track actions
-                    if "detected_actions" in result and result["detected_actions"]:
-                        for action, count in result["detected_actions"].items():
-                            if action not in stats["actions"]:
-                                stats["actions"][action] = 0
-                            stats["actions"][action] += count
-            
-            video_time = time.time() - video_start_time
-            print(f"  - Processing time: {video_time:.2f} seconds")
-
-        except Exception as e:
-            print(f"  - Error processing video: {e}")
-            stats["errors"].append({
-                "file": str(video_path),
-                "error": str(e)
-            })
-        
-        # Add delay between requests
-        if i < len(video_files) and delay > 0:
-            time.sleep(delay)
+    with open(results_path, 'wb') as results_log:
+        if workers > 0:
+            results = _process_files_threaded(
+                image_files,
+                video_files,
+                api_url_image,
+                api_url_video,
+                output_directory,
+                processed_dir if return_media else None,
+                save_media,
+                save_results,
+                stats,
+                workers,
+                rate,
+                cache_dir,
+                results_log
+            )
+        else:
+            results = asyncio.run(_process_files_async(
+                image_files,
+                video_files,
+                api_url_image,
+                api_url_video,
+                output_directory,
+                processed_dir if return_media else None,
+                save_media,
+                save_results,
+                stats,
+                concurrency,
+                rate,
+                cache_dir,
+                results_log,
+                batch_size,
+                batch_url or f"{api_url_image}/batch"
+            ))
 
     # Calculate total processing time
     stats["processing_time"] = time.time() - start_time
+    action_counts = stats["actions"]
+    stats["actions"] = dict(action_counts)
 
-    # Create a summary file with detailed statistics
-    summary_path = output_directory / "pose_detection_summary.json"
-    with open(summary_path, 'w') as f:
-        summary = {
-            "statistics": stats,
-            "results_by_file": {
-                str(path): {
-                    "poses": result.get("count", 0) if isinstance(result, dict) else 0,
-                    "actions": result.get("detected_actions", {}) if isinstance(result, dict) else {},
-                    "results_file": result.get("results_file") if isinstance(result, dict) else None,
-                    "media_path": result.get("image_path", result.get("video_path")) if isinstance(result, dict) else None
-                } for path, result in results.items()
-            }
-        }
-        json.dump(summary, f, indent=2)
+    # Create a summary file with the statistics, pointing at the per-file entries
+    summary = {
+        "statistics": stats,
+        "file_results": str(results_path)
+    }
+    _write_json(summary_path, summary)
 
-    print(f"\nProcessing complete. Processed {len(image_files)} images and {len(video_files)} videos in {stats['processing_time']:.2f} seconds.")
-    print(f"Total poses detected: {stats['total_poses_detected']}")
+    logger.info(
+        "\nProcessing complete. Processed %d images and %d videos in %.2f seconds.",
+        len(image_files), len(video_files), stats['processing_time']
+    )
+    logger.info("Total poses detected: %s", stats['total_poses_detected'])
     
-    if stats["actions"]:
-        print("\nDetected actions:")
-        for action, count in sorted(stats["actions"].items(), key=lambda x: x[1], reverse=True):
-            print(f"  - {action}: {count} instances")
+    if action_counts:
+        logger.info("\nDetected actions:")
+        for action, count in action_counts.most_common():
+            logger.info("  - %s: %s instances", action, count)
     
     if stats["errors"]:
-        print(f"\nErrors encountered: {len(stats['errors'])}")
+        logger.info("\nErrors encountered: %d", len(stats['errors']))
         for error in stats["errors"][:5]:  # Show only first 5 errors
-            print(f"  - {Path(error['file']).name}: {error['error']}")
+            logger.info("  - %s: %s", Path(error['file']).name, error['error'])
         if len(stats["errors"]) > 5:
-            print(f"  ... and {len(stats['errors']) - 5} more errors")
+            logger.info("  ... and %d more errors", len(stats['errors']) - 5)
     
-    print(f"\nSummary saved to {summary_path}")
+    logger.info("\nSummary saved to %s", summary_path)
 
     return results
 
@@ -461,34 +1291,42 @@ def create_action_chart(stats: Dict[str, Any], output_dir: Path):
     """
     # Extract action data
     if not stats.get("actions"):
-        print("No actions detected, chart not created")
+        logger.info("No actions detected, chart not created")
         return
         
     # Sort actions by count (descending)
     actions = sorted(stats["actions"].items(), key=lambda x: x[1], reverse=True)
     
-    # Determine the maximum length of action names for formatting
+    # Determine the maximum length of action names for formatting, the
+    # largest count is already first after sorting
     max_name_len = max(len(name) for name, _ in actions)
-    max_count = max(count for _, count in actions)
+    max_count = actions[0][1]
     
-    # Create chart file
+    # Build the whole chart, bars are proportional to the count with at most 40 chars
+    lines = [
+        f"{'Action':{max_name_len}} | Count | Chart",
+        "-" * (max_name_len + 2 + 7 + 2 + 50)
+    ]
+    if max_count > 0:
+        # The bar length is truncated to a whole number of characters
+        lines.extend(
+            f"{action:{max_name_len}} | {count:5} | {'#' * int(count * 40 / max_count)}"
+            for action, count in actions
+        )
+    else:
+        lines.extend(f"{action:{max_name_len}} | {count:5} | " for action, count in actions)
+
+    # Write the chart file in one go
     chart_path = output_dir / "action_summary.txt"
-    with open(chart_path, 'w') as f:
-        f.write(f"{'Action':{max_name_len}} | Count | Chart\n")
-        f.write("-" * (max_name_len + 2 + 7 + 2 + 50) + "\n")
-        
-        # Generate chart lines
-        for action, count in actions:
-            # Calculate bar length (proportional to count, max 40 chars)
-            bar_length = int((count / max_count) * 40) if max_count > 0 else 0
-            bar = "#" * bar_length
-            
-            f.write(f"{action:{max_name_len}} | {count:5} | {bar}\n")
+    chart_path.write_text("\n".join(lines) + "\n")
     
-    print(f"\nAction summary chart saved to {chart_path}")
+    logger.info("\nAction summary chart saved to %s", chart_path)
 
 
 if __name__ == "__main__":
+    # Imported here so library users of this module do not pay for it
+    import argparse
+
     # Set up argument parser
     parser = argparse.ArgumentParser(description='Process multiple files in a directory for pose detection')
     
@@ -497,8 +1335,21 @@ if __name__ == "__main__":
                         help='URL of the pose detection image API endpoint')
     parser.add_argument('--video-url', default="http://localhost:8001/detect/pose/video",
                         help='URL of the pose detection video API endpoint')
-    parser.add_argument('--delay', type=float, default=0.5,
-                        help='Delay between processing files (seconds)')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Maximum number of files sent to the API at once')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Send files from this many threads using requests instead of aiohttp (default: 0, use aiohttp)')
+    parser.add_argument('--rate', type=float,
+                        help='Maximum average number of files sent to the API per second (default: no limit)')
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help='Average spacing between files in seconds, ignored when --rate is given')
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='Number of images sent per request to the batch endpoint (default: 1, no batching)')
+    parser.add_argument('--batch-url',
+                        help='URL of the batch pose detection endpoint (default: --image-url with a "/batch" suffix)')
+    parser.add_argument('--cache', action='store_true',
+                        help='Reuse results of earlier runs for files with the same path, size and modification '
+                             f'time, kept with a copy of any returned media in {CACHE_DIR_NAME} under the output directory')
     parser.add_argument('--image-formats', default='jpg,jpeg,png',
                         help='Comma-separated list of image formats to process')
     parser.add_argument('--video-formats', default='mp4,avi,mov,wmv,mkv',
@@ -515,6 +1366,16 @@ if __name__ == "__main__":
     
     # Parse arguments
     args = parser.parse_args()
+
+    # Log progress messages to stdout as plain lines. Records only go through a
+    # queue on the calling thread, the listener thread does the writing, so
+    # concurrent requests never wait on the terminal
+    log_queue = queue.SimpleQueue()
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    log_listener = QueueListener(log_queue, console)
+    logging.basicConfig(level=logging.INFO, format="%(message)s", handlers=[QueueHandler(log_queue)])
+    log_listener.start()
     
     # Convert formats strings to tuples
     image_formats = tuple(f'.{fmt}' for fmt in args.image_formats.split(','))
@@ -522,8 +1383,8 @@ if __name__ == "__main__":
     
     # Process the directory
     try:
-        print(f"Starting to process directory: {args.directory_path}")
-        print(f"Mode: {args.mode}, Return media: {args.return_media}, Save media: {args.save_media}")
+        logger.info("Starting to process directory: %s", args.directory_path)
+        logger.info("Mode: %s, Return media: %s, Save media: %s", args.mode, args.return_media, args.save_media)
         
         results = process_directory(
             args.directory_path,
@@ -536,7 +1397,13 @@ if __name__ == "__main__":
             args.return_media,
             args.save_media,
             args.save_results,
-            args.mode
+            args.mode,
+            args.concurrency,
+            args.rate,
+            args.cache,
+            args.batch_size,
+            args.batch_url,
+            args.workers
         )
         
         # Load summary for action chart
@@ -544,14 +1411,15 @@ if __name__ == "__main__":
         summary_path = output_dir / "pose_detection_summary.json"
         
         if summary_path.exists():
-            with open(summary_path, 'r') as f:
-                summary = json.load(f)
-                stats = summary.get("statistics", {})
-                create_action_chart(stats, output_dir)
+            summary = _json_loads(summary_path.read_bytes())
+            stats = summary.get("statistics", {})
+            create_action_chart(stats, output_dir)
         
-        print("\nProcessing completed successfully!")
+        logger.info("\nProcessing completed successfully!")
         
     except Exception as e:
-        print(f"\nError: {e}")
+        logger.error("\nError: %s", e)
         import traceback
         traceback.print_exc()
+    finally:
+        log_listener.stop()
@@ -1,19 +1,112 @@
+import asyncio
+import threading
+
 import cv2
 from aiohttp import web
 
+# libjpeg-turbo through PyTurboJPEG is used for encoding when it is installed
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    turbo_jpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    turbo_jpeg = None
+
+FPS = 30
+JPEG_QUALITY = 80
+
+# Seconds to wait before reopening a camera that stopped delivering frames
+RETRY_MIN_DELAY = 1
+RETRY_MAX_DELAY = 30
+
+
+def encode_jpeg(frame):
+    if turbo_jpeg is not None:
+        return turbo_jpeg.encode(frame, quality=JPEG_QUALITY, pixel_format=TJPF_BGR)
+    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    return buffer.tobytes()
+
+
+class Camera:
+    """Reads frames in a background thread and keeps the latest JPEG for every viewer."""
+
+    def __init__(self, device=0):
+        self.device = device
+        self.frame = None
+        self.running = False
+        self._stop = threading.Event()
+
+    @property
+    def stopped(self):
+        return self._stop.is_set()
+
+    def open(self):
+        cap = cv2.VideoCapture(self.device)
+
+        # Cameras that deliver MJPG already send JPEG frames, so when the backend
+        # can hand them over undecoded they are forwarded without encoding again
+        mjpg = cv2.VideoWriter_fourcc(*'MJPG')
+        cap.set(cv2.CAP_PROP_FOURCC, mjpg)
+        passthrough = int(cap.get(cv2.CAP_PROP_FOURCC)) == mjpg and cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        return cap, bool(passthrough)
+
+    def capture_loop(self):
+        # A camera that stops delivering frames is reopened, waiting longer after each failure
+        backoff = RETRY_MIN_DELAY
+        while not self._stop.is_set():
+            cap, passthrough = self.open()
+            try:
+                while cap.isOpened() and not self._stop.is_set():
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    self.frame = frame.tobytes() if passthrough else encode_jpeg(frame)
+                    self.running = True
+                    backoff = RETRY_MIN_DELAY
+            finally:
+                cap.release()
+                self.running = False
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, RETRY_MAX_DELAY)
+
+    def stop(self):
+        self._stop.set()
+
+
+async def camera_ctx(app):
+    # One capture shared by all requests, read off the event loop
+    camera = Camera()
+    capture = asyncio.get_running_loop().run_in_executor(None, camera.capture_loop)
+    app['camera'] = camera
+    yield
+    camera.stop()
+    await capture
+
+
 async def video_feed(request):
-    cap = cv2.VideoCapture(0)
-
-    async def stream():
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            _, buffer = cv2.imencode('.jpg', frame)
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
-    return web.Response(body=stream(), content_type='multipart/x-mixed-replace; boundary=frame')
+    camera = request.app['camera']
+    if not camera.running:
+        raise web.HTTPServiceUnavailable(text='Camera is not available')
+
+    response = web.StreamResponse()
+    response.content_type = 'multipart/x-mixed-replace; boundary=frame'
+    await response.prepare(request)
+
+    last_frame = None
+    try:
+        # Viewers stay connected while the camera is being reopened
+        while not camera.stopped:
+            frame = camera.frame
+            if frame is not None and frame is not last_frame:
+                await response.write(b'--frame\r\n'
+                                     b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+                last_frame = frame
+            await asyncio.sleep(1 / FPS)
+    except ConnectionResetError:
+        # The viewer went away, the camera keeps running for the others
+        pass
+    return response
 
 app = web.Application()
+app.cleanup_ctx.append(camera_ctx)
 app.router.add_get('/video', video_feed)
 web.run_app(app, host='localhost', port=8080)